@@ -1,12 +1,30 @@
-from fastapi import APIRouter, HTTPException, Header
+import json as json_lib
+
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.db.supabase import get_client
+from app.api.fields import projection
+from app.db import keyset
+from app.db.storage import get_storage
 from app.core.config import settings
+from app.services import bulk_jobs, llm_cache, response_cache, similar
 
 
 class BulkIds(BaseModel):
     ids: list[str]
 
+
+class BulkFilter(BaseModel):
+    status: str = "pending"
+    company: str | None = None
+    severity: str | None = None
+
+
+class BulkJobCreate(BaseModel):
+    action: str                      # publish | reject
+    ids: list[str] | None = None
+    filter: BulkFilter | None = None
+
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
@@ -16,51 +34,159 @@ def require_admin(x_admin_secret: str = Header(...)):
 
 
 @router.get("/queue")
-async def get_queue(x_admin_secret: str = Header(...)):
+async def get_queue(
+    x_admin_secret: str = Header(...),
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = None,
+    fields: str | None = None,
+):
+    """Pending rows, newest first, a page at a time: pass back `next_cursor`
+    as `cursor`. `fields` works as on GET /postmortems/."""
     require_admin(x_admin_secret)
     try:
-        db = await get_client()
-        result = await db.table("postmortems").select("*").eq("status", "pending").order("created_at", desc=True).execute()
-        return result.data
+        columns = projection(fields, "id", "created_at")
+        after = keyset.decode_cursor(cursor, "created_at", True) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        storage = await get_storage()
+        rows, total = await storage.postmortems.list_by_status(
+            "pending", limit=limit, after=after, fields=columns,
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
+    next_cursor = keyset.encode_cursor(rows[-1], "created_at", True) if len(rows) == limit else None
+    return {"data": rows, "total": total, "next_cursor": next_cursor}
+
+
+@router.get("/summaries/worker")
+async def summary_worker_stats(request: Request, x_admin_secret: str = Header(...)):
+    require_admin(x_admin_secret)
+    worker = getattr(request.app.state, "summary_worker", None)
+    if worker is None:
+        return {"enabled": False}
+    return {"enabled": True, **worker.stats.as_dict()}
+
+
+@router.get("/llm-cache")
+async def llm_cache_stats(x_admin_secret: str = Header(...)):
+    require_admin(x_admin_secret)
+    cache = llm_cache.get_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **await cache.stats()}
+
+
+@router.delete("/llm-cache")
+async def clear_llm_cache(x_admin_secret: str = Header(...)):
+    require_admin(x_admin_secret)
+    cache = llm_cache.get_cache()
+    if cache is None:
+        raise HTTPException(status_code=503, detail="LLM response cache is disabled")
+    return {"deleted": await cache.clear()}
 
 
 @router.patch("/{id}/publish")
 async def publish_entry(id: str, x_admin_secret: str = Header(...)):
     require_admin(x_admin_secret)
-    db = await get_client()
-    result = await db.table("postmortems").update({"status": "published"}).eq("id", id).execute()
-    return result.data
+    storage = await get_storage()
+    rows = await storage.postmortems.set_status([id], "published")
+    # Index first: a similar request cached in between would keep the old index's answer
+    await similar.update(rows)
+    await response_cache.invalidate()
+    return rows
 
 
 @router.patch("/{id}/reject")
 async def reject_entry(id: str, x_admin_secret: str = Header(...)):
     require_admin(x_admin_secret)
-    db = await get_client()
-    result = await db.table("postmortems").update({"status": "rejected"}).eq("id", id).execute()
-    return result.data
+    storage = await get_storage()
+    rows = await storage.postmortems.set_status([id], "rejected")
+    await similar.update(rows)
+    await response_cache.invalidate()
+    return rows
 
 
 @router.delete("/{id}")
 async def delete_entry(id: str, x_admin_secret: str = Header(...)):
     require_admin(x_admin_secret)
-    db = await get_client()
-    await db.table("postmortems").delete().eq("id", id).execute()
+    storage = await get_storage()
+    await storage.postmortems.delete(id)
+    await similar.remove([id])
+    await response_cache.invalidate()
     return {"deleted": id}
 
 
+async def _run_bulk(action: str, ids: list[str]) -> dict:
+    storage = await get_storage()
+    job = bulk_jobs.start(storage.postmortems, action, ids=ids, on_change=response_cache.invalidate)
+    await job.wait()
+    return {"updated": job.updated, "failed": job.failed, "job": job.id}
+
+
 @router.post("/bulk-publish")
 async def bulk_publish(body: BulkIds, x_admin_secret: str = Header(...)):
+    """Publish ids in chunks and wait for the result; see POST /admin/jobs
+    for large sets."""
     require_admin(x_admin_secret)
-    db = await get_client()
-    result = await db.table("postmortems").update({"status": "published"}).in_("id", body.ids).execute()
-    return {"updated": len(result.data)}
+    return await _run_bulk("publish", body.ids)
 
 
 @router.post("/bulk-reject")
 async def bulk_reject(body: BulkIds, x_admin_secret: str = Header(...)):
     require_admin(x_admin_secret)
-    db = await get_client()
-    result = await db.table("postmortems").update({"status": "rejected"}).in_("id", body.ids).execute()
-    return {"updated": len(result.data)}
+    return await _run_bulk("reject", body.ids)
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(body: BulkJobCreate, x_admin_secret: str = Header(...)):
+    """Start a background bulk publish / reject of `ids` or of every row
+    matching `filter`; follow it at GET /admin/jobs/{id}/events."""
+    require_admin(x_admin_secret)
+    storage = await get_storage()
+    try:
+        job = bulk_jobs.start(
+            storage.postmortems, body.action,
+            ids=body.ids,
+            filter=body.filter.model_dump() if body.filter else None,
+            on_change=response_cache.invalidate,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.as_dict()
+
+
+@router.get("/jobs")
+async def list_jobs(x_admin_secret: str = Header(...)):
+    require_admin(x_admin_secret)
+    return [job.as_dict() for job in bulk_jobs.list_jobs()]
+
+
+def _get_job(id: str) -> bulk_jobs.BulkJob:
+    job = bulk_jobs.get(id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{id}")
+async def get_job(id: str, x_admin_secret: str = Header(...)):
+    require_admin(x_admin_secret)
+    return _get_job(id).as_dict()
+
+
+@router.get("/jobs/{id}/events")
+async def job_events(id: str, x_admin_secret: str = Header(...)):
+    """SSE: every event so far, then live progress until the final summary."""
+    require_admin(x_admin_secret)
+    job = _get_job(id)
+
+    async def generate():
+        async for event in job.events():
+            yield f"data: {json_lib.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,32 @@
+"""
+The `fields=` projection shared by the list endpoints.
+"""
+
+# Every postmortem column, and the default projection for list endpoints:
+# all but ai_summary (most of a row's bytes), the summary worker's claim and
+# the dedupe fingerprint
+POSTMORTEM_FIELDS = (
+    "id", "company", "title", "url", "source_url", "published_at", "severity",
+    "affected_services", "root_cause_category", "ai_summary", "tags", "status",
+    "created_at", "summary_status", "summary_started_at", "fingerprint", "duplicate_of",
+)
+LIST_FIELDS = tuple(
+    f for f in POSTMORTEM_FIELDS
+    if f not in {"ai_summary", "summary_status", "summary_started_at", "fingerprint"}
+)
+
+
+def projection(fields: str | None, *required: str) -> tuple[str, ...] | None:
+    """Parse a `fields=` query value: comma-separated columns, "all" for
+    every column, or None / empty for LIST_FIELDS. `required` columns (e.g.
+    what a cursor is built from) are always included."""
+    if fields and fields.strip() == "all":
+        return None
+    if not fields or not fields.strip():
+        chosen = list(LIST_FIELDS)
+    else:
+        chosen = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in chosen if f not in POSTMORTEM_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(chosen) + tuple(f for f in required if f not in chosen)
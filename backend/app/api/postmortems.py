@@ -1,57 +1,191 @@
-from fastapi import APIRouter, HTTPException, Query
-from app.db.supabase import get_client
-from app.services.groq import generate_summary
+import json as json_lib
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.api.fields import LIST_FIELDS, projection
+from app.db import keyset
+from app.db.storage import get_storage
+from app.services import export, response_cache, similar, summaries
 
 router = APIRouter(prefix="/postmortems", tags=["postmortems"])
 
 _ALLOWED_SORT = {"published_at", "company", "created_at"}
+_ALLOWED_COUNT = {"exact", "planned", "estimated", "none"}
 
 
 @router.get("/")
 async def list_postmortems(
+    request: Request,
     company: str | None = None,
     severity: str | None = None,
     sort_by: str = "published_at",
     sort_dir: str = "desc",
     limit: int = Query(default=20, le=100),
     offset: int = 0,
+    cursor: str | None = None,
+    count: str = "exact",
+    fields: str | None = None,
 ):
+    """List published postmortems.
+
+    Pass back `next_cursor` as `cursor` to page by keyset instead of
+    offset (constant cost at any depth). `count` picks how `total` is
+    computed: exact, planned / estimated (from planner statistics), or none.
+    `fields` is a comma-separated column list, or "all"; by default every
+    column but ai_summary is returned.
+    """
     if sort_by not in _ALLOWED_SORT:
         sort_by = "published_at"
+    if count not in _ALLOWED_COUNT:
+        count = "exact"
+    desc = sort_dir != "asc"
+    try:
+        columns = projection(fields, "id", sort_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    params = {
+        "company": company, "severity": severity, "sort_by": sort_by, "desc": desc,
+        "limit": limit, "offset": None if cursor else offset, "cursor": cursor, "count": count,
+        "fields": columns,
+    }
+    return await response_cache.respond(
+        request,
+        response_cache.make_key("list", params),
+        lambda: _list_postmortems(company, severity, sort_by, desc, limit, offset, cursor, count, columns),
+    )
+
+
+async def _list_postmortems(company, severity, sort_by, desc, limit, offset, cursor, count, columns) -> dict:
+    after = None
+    if cursor:
+        try:
+            after = keyset.decode_cursor(cursor, sort_by, desc)
+        except keyset.InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    storage = await get_storage()
+    rows, total = await storage.postmortems.list_published(
+        company=company, severity=severity, sort_by=sort_by, desc=desc,
+        limit=limit, offset=offset, after=after, count=count, fields=columns,
+    )
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = keyset.encode_cursor(rows[-1], sort_by, desc)
+    return {"data": rows, "total": total, "next_cursor": next_cursor}
+
+
+@router.get("/search")
+async def search(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    company: str | None = None,
+    severity: str | None = None,
+    limit: int = Query(default=20, le=100),
+    offset: int = 0,
+):
+    """Ranked full-text search with company / severity / root cause / tag facets."""
+    params = {"q": q.strip(), "company": company, "severity": severity, "limit": limit, "offset": offset}
 
-    db = await get_client()
-    query = db.table("postmortems").select("*", count="exact").eq("status", "published")
-    if company:
-        query = query.eq("company", company)
-    if severity:
-        query = query.eq("severity", severity)
+    async def load():
+        storage = await get_storage()
+        return await storage.postmortems.search(q.strip(), company=company, severity=severity, limit=limit, offset=offset)
 
-    result = await query.order(sort_by, desc=(sort_dir != "asc")).range(offset, offset + limit - 1).execute()
-    return {"data": result.data, "total": result.count or 0}
+    return await response_cache.respond(request, response_cache.make_key("search", params), load)
+
+
+@router.get("/stats")
+async def stats(
+    request: Request,
+    company: str | None = None,
+    since: str | None = Query(default=None, pattern=r"^\d{4}-\d{2}$"),
+    top_tags: int = Query(default=20, le=100),
+):
+    """Incident counts by company × severity × month, top tags and mean time
+    between incidents per company, read from the rollup tables (migration 007)."""
+    since_month = None
+    if since:
+        try:
+            since_month = date.fromisoformat(f"{since}-01").isoformat()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="since must be YYYY-MM")
+
+    async def load():
+        storage = await get_storage()
+        return await storage.postmortems.stats(company=company, since=since_month, top_tags=top_tags)
+
+    params = {"company": company, "since": since_month, "top_tags": top_tags}
+    return await response_cache.respond(request, response_cache.make_key("stats", params), load)
+
+
+@router.get("/export")
+async def export_postmortems(
+    format: str = "ndjson",
+    company: str | None = None,
+    severity: str | None = None,
+    batch_size: int = Query(default=export.DEFAULT_BATCH_SIZE, ge=1, le=5000),
+):
+    """Every published postmortem (optionally filtered) in one streamed
+    response: ndjson, csv or parquet. Rows are read in keyset batches, so
+    memory stays flat however large the export."""
+    storage = await get_storage()
+    try:
+        chunks = export.stream(storage.postmortems, format, company=company, severity=severity, batch_size=batch_size)
+    except export.ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        chunks,
+        media_type=export.FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="postmortems.{format}"',
+            "Cache-Control": "no-store",
+        },
+    )
 
 
 @router.get("/{id}")
-async def get_postmortem(id: str):
-    db = await get_client()
+async def get_postmortem(id: str, request: Request):
+    return await response_cache.respond(request, response_cache.make_key("get", {"id": id}), lambda: _get_postmortem(id))
+
+
+async def _get_postmortem(id: str) -> dict:
+    storage = await get_storage()
     try:
-        result = await db.table("postmortems").select("*").eq("id", id).single().execute()
+        post = await storage.postmortems.get(id)
     except Exception:
         raise HTTPException(status_code=404, detail="Not found")
-    if not result.data:
+    if not post:
         raise HTTPException(status_code=404, detail="Not found")
-    return result.data
+    return post
+
+
+@router.get("/{id}/similar")
+async def similar_postmortems(id: str, request: Request, k: int = Query(default=10, ge=1, le=50)):
+    """Published postmortems most like this one, from the local vector index
+    (title, tags, services, root cause, summary), best first with a cosine score."""
+    if not similar.enabled():
+        raise HTTPException(status_code=503, detail="Similar incidents are disabled")
+
+    async def load():
+        storage = await get_storage()
+        rows = await similar.similar(storage.postmortems, id, k, fields=LIST_FIELDS)
+        if rows is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        return {"data": rows}
+
+    return await response_cache.respond(request, response_cache.make_key("similar", {"id": id, "k": k}), load)
 
 
 @router.post("/{id}/summary")
 async def get_or_generate_summary(id: str):
-    db = await get_client()
+    storage = await get_storage()
 
     try:
-        result = await db.table("postmortems").select("*").eq("id", id).single().execute()
+        post = await storage.postmortems.get(id)
     except Exception:
         raise HTTPException(status_code=404, detail="Not found")
 
-    post = result.data
     if not post:
         raise HTTPException(status_code=404, detail="Not found")
 
@@ -60,12 +194,49 @@ async def get_or_generate_summary(id: str):
         return {"summary": post["ai_summary"], "cached": True}
 
     try:
-        summary = await generate_summary(post)
+        summary = await summaries.summarise(storage.postmortems, post)
     except ValueError as e:
         raise HTTPException(status_code=502, detail=str(e))
     except Exception:
         raise HTTPException(status_code=502, detail="AI generation failed")
 
-    await db.table("postmortems").update({"ai_summary": summary}).eq("id", id).execute()
-
     return {"summary": summary, "cached": False}
+
+
+@router.post("/{id}/summary/stream")
+async def stream_summary(id: str):
+    storage = await get_storage()
+
+    try:
+        post = await storage.postmortems.get(id)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    if not post:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    async def generate():
+        if post.get("ai_summary"):
+            yield f"data: {json_lib.dumps({'type': 'done', 'summary': post['ai_summary'], 'cached': True})}\n\n"
+            return
+
+        parts = []
+        try:
+            async for delta in summaries.stream(storage.postmortems, post):
+                parts.append(delta)
+                yield f"data: {json_lib.dumps({'type': 'delta', 'text': delta})}\n\n"
+        except ValueError as e:
+            yield f"data: {json_lib.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            return
+        except Exception:
+            yield f"data: {json_lib.dumps({'type': 'error', 'message': 'AI generation failed'})}\n\n"
+            return
+
+        summary = "".join(parts).strip()
+        yield f"data: {json_lib.dumps({'type': 'done', 'summary': summary, 'cached': False})}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,11 +2,87 @@ from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
-    supabase_url: str
-    supabase_key: str
+    # Storage (app.db.storage)
+    storage_backend: str = "supabase"   # supabase | sqlite
+    sqlite_path: str = "continuum.db"   # when storage_backend=sqlite
+    supabase_url: str = ""
+    supabase_key: str = ""
+
     groq_api_key: str = ""
     # gemini_api_key: str = ""  # replaced by Groq
     admin_secret: str
+    ingest_chunk_size: int = 500
+    sync_host_rate: float = 2.0   # page requests per second per status page host
+    sync_host_burst: int = 4
+
+    # Groq HTTP client (shared for the app lifetime)
+    groq_timeout: float = 30.0
+    groq_connect_timeout: float = 5.0
+    groq_max_connections: int = 20
+    groq_max_keepalive: int = 10
+    groq_keepalive_expiry: float = 60.0
+    groq_max_retries: int = 3
+    groq_backoff_base: float = 0.5   # seconds, doubled per attempt
+    groq_backoff_max: float = 20.0
+
+    # On-disk LLM response cache in front of Groq (app.services.llm_cache)
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "llm_cache.db"
+    llm_cache_max_entries: int = 20000
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Cross-worker summary claim via postmortems.summary_status (migration 004)
+    summary_lock: bool = False
+    summary_lock_ttl: float = 60.0
+
+    # Background summary worker (app.services.summary_worker)
+    summary_worker_enabled: bool = False
+    summary_worker_concurrency: int = 4
+    summary_worker_rpm: int = 30
+    summary_worker_tpm: int = 12000
+    summary_worker_batch_size: int = 50
+    summary_worker_idle_seconds: float = 300.0
+
+    # Built-in source sync scheduler (app.services.scheduler)
+    sync_scheduler_enabled: bool = False
+    sync_scheduler_concurrency: int = 4
+    sync_scheduler_min_interval: float = 300.0      # seconds
+    sync_scheduler_max_interval: float = 86400.0
+    sync_scheduler_initial_interval: float = 3600.0
+    sync_scheduler_jitter: float = 0.1              # ± fraction of the interval
+    sync_scheduler_poll_seconds: float = 30.0
+
+    # Near-duplicate detection at ingest (app.services.dedupe, migration 009)
+    dedupe_enabled: bool = True
+    dedupe_action: str = "flag"      # flag (set duplicate_of only) | hold (also hold as pending) | merge
+    dedupe_threshold: float = 0.6    # estimated Jaccard similarity of titles
+    dedupe_window_days: float = 7.0  # max published_at distance
+
+    # Admin bulk publish / reject jobs (app.services.bulk_jobs)
+    bulk_chunk_size: int = 200       # ids per update
+    bulk_chunk_retries: int = 3
+    bulk_retry_backoff: float = 0.5  # seconds, doubled per attempt
+    bulk_jobs_kept: int = 50
+
+    # "Similar incidents" vector index (app.services.similar)
+    similar_enabled: bool = True
+    similar_index_dir: str = "similar_index"
+    similar_refresh_seconds: float = 60.0
+
+    # Read endpoint response cache (app.services.response_cache)
+    cache_backend: str = "memory"   # memory | redis | none
+    cache_url: str = ""             # redis://... when cache_backend=redis
+    cache_ttl: float = 300.0
+    cache_memory_ttl: float = 10.0  # memory backend: bounds staleness in workers that didn't see a write
+    cache_max_entries: int = 2048
+    cache_max_age: int = 30         # Cache-Control max-age sent to clients
+
+    # Response compression (app.services.compression); brotli needs the `brotli` package
+    compression_enabled: bool = True
+    compression_min_size: int = 500   # bytes
+
+    # GET /metrics and per-route request timing (app.services.metrics)
+    metrics_enabled: bool = True
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,61 @@
+"""
+Keyset (cursor) pagination helpers for PostgREST queries.
+
+Rows are ordered by (sort column, id) in the same direction, with Postgres'
+default null placement (nulls first when descending, last when ascending),
+so a page is "everything after the last row's (value, id)" and costs the
+same at any depth given a matching (…, sort column, id) index.
+"""
+
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(row: dict, sort_by: str, desc: bool) -> str:
+    payload = [sort_by, "desc" if desc else "asc", row.get(sort_by), row["id"]]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, desc: bool) -> tuple:
+    """Return (value, id) from a cursor issued for the same sort order."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cur_sort, cur_dir, value, id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+    if cur_sort != sort_by or cur_dir != ("desc" if desc else "asc"):
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    return value, id
+
+
+def _quote(value) -> str:
+    # PostgREST logic-tree values are double-quoted so commas, dots and
+    # parentheses in e.g. company names can't break the filter
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def order(query, sort_by: str, desc: bool):
+    return query.order(sort_by, desc=desc).order("id", desc=desc)
+
+
+def after(query, sort_by: str, desc: bool, value, id: str):
+    """Restrict `query` to rows that come after (value, id) in keyset order."""
+    op = "lt" if desc else "gt"
+    q_id = _quote(id)
+    if value is None:
+        if desc:
+            # Nulls first: remaining nulls, then every non-null row
+            return query.or_(f"and({sort_by}.is.null,id.{op}.{q_id}),{sort_by}.not.is.null")
+        return query.is_(sort_by, "null").gt("id", id)
+
+    q_val = _quote(value)
+    condition = f"{sort_by}.{op}.{q_val},and({sort_by}.eq.{q_val},id.{op}.{q_id})"
+    if not desc:
+        # Nulls last: they follow every non-null value
+        condition += f",{sort_by}.is.null"
+    return query.or_(condition)
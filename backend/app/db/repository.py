@@ -0,0 +1,196 @@
+"""
+Storage interfaces.
+
+Everything outside app/db talks to storage through these two repositories,
+so the API, the sync pipelines and the workers run unchanged on Supabase
+(app.db.supabase) or on a local SQLite file (app.db.sqlite). Pick one with
+`settings.storage_backend`; see app.db.storage.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+
+
+class PostmortemRepository(ABC):
+    # ── Public reads ──────────────────────────────────────────────────────
+    @abstractmethod
+    async def list_published(
+        self,
+        *,
+        company: str | None,
+        severity: str | None,
+        sort_by: str,
+        desc: bool,
+        limit: int,
+        offset: int = 0,
+        after: tuple | None = None,
+        count: str = "exact",
+        fields: tuple[str, ...] | None = None,
+    ) -> tuple[list[dict], int]:
+        """One page of published rows and the total (0 when count="none").
+
+        Pages by offset, or by keyset when `after` is a (sort value, id)
+        pair. Rows are ordered by (sort_by, id), nulls first when
+        descending and last when ascending. `fields` limits the columns
+        returned (all of them when None).
+        """
+
+    @abstractmethod
+    async def get(self, id: str) -> dict | None: ...
+
+    @abstractmethod
+    async def get_many(self, ids: list[str], *, fields: tuple[str, ...] | None = None) -> list[dict]:
+        """Rows for the ids that exist, in no particular order."""
+
+    @abstractmethod
+    async def search(
+        self, q: str, *, company: str | None, severity: str | None, limit: int, offset: int,
+    ) -> dict:
+        """Ranked full-text matches: {"total", "data", "facets"}."""
+
+    @abstractmethod
+    async def stats(self, *, company: str | None, since: str | None, top_tags: int) -> dict:
+        """{"monthly", "top_tags", "companies"} analytics rollups."""
+
+    # ── Admin ─────────────────────────────────────────────────────────────
+    @abstractmethod
+    async def list_by_status(
+        self,
+        status: str,
+        *,
+        limit: int,
+        after: tuple | None = None,
+        count: str = "exact",
+        fields: tuple[str, ...] | None = None,
+        company: str | None = None,
+        severity: str | None = None,
+    ) -> tuple[list[dict], int]:
+        """One page of rows with `status`, newest created first, and the total.
+
+        Keyset paged on (created_at, id) descending via `after`.
+        """
+
+    @abstractmethod
+    async def set_status(self, ids: list[str], status: str) -> list[dict]:
+        """Update status for ids; returns the updated rows."""
+
+    @abstractmethod
+    async def delete(self, id: str) -> None: ...
+
+    # ── Ingestion ─────────────────────────────────────────────────────────
+    @abstractmethod
+    async def existing_ids(self, ids: list[str]) -> set[str]: ...
+
+    @abstractmethod
+    async def insert_new(self, rows: list[dict]) -> None:
+        """Multi-row insert that silently skips ids that already exist."""
+
+    @abstractmethod
+    async def upsert(self, rows: list[dict]) -> list[dict]:
+        """Insert or fully overwrite rows by id."""
+
+    @abstractmethod
+    async def update(self, id: str, values: dict) -> None:
+        """Set the given columns on one row."""
+
+    # ── Near-duplicate detection (app.services.dedupe) ────────────────────
+    @abstractmethod
+    async def fingerprint_candidates(self, band_keys: list[str]) -> list[dict]:
+        """{"id", "company", "published_at", "fingerprint", "duplicate_of"} of
+        fingerprinted rows filed under any of the LSH band keys."""
+
+    @abstractmethod
+    async def add_fingerprint_bands(self, bands: list[tuple[str, str]]) -> None:
+        """File (band key, postmortem id) pairs, skipping ones already stored."""
+
+    # ── AI summaries ──────────────────────────────────────────────────────
+    @abstractmethod
+    async def set_summary(self, id: str, summary: str, *, only_if_missing: bool = False) -> None:
+        """Store ai_summary (and clear any generation claim)."""
+
+    @abstractmethod
+    async def set_summaries(self, summaries: list[tuple[str, str]]) -> list[str]:
+        """Store (id, summary) pairs on rows that still have no ai_summary, in
+        one statement; returns the ids that were updated."""
+
+    @abstractmethod
+    async def claim_summary(self, id: str, stale_before: datetime) -> bool:
+        """Mark the row as generating unless it has a summary or a live claim."""
+
+    @abstractmethod
+    async def release_summary_claim(self, id: str) -> None: ...
+
+    @abstractmethod
+    async def summary_state(self, id: str) -> dict | None:
+        """{"ai_summary", "summary_status"} for the row, or None if it's gone."""
+
+    @abstractmethod
+    async def pending_summaries(
+        self, after_id: str | None, limit: int, *, stale_before: datetime | None = None,
+    ) -> list[dict]:
+        """Non-rejected rows without ai_summary, in id order after `after_id`.
+        With `stale_before`, rows claimed since then are left to their claimant."""
+
+    @abstractmethod
+    async def count_pending_summaries(self) -> int: ...
+
+
+class SourceRepository(ABC):
+    @abstractmethod
+    async def list_all(self) -> list[dict]:
+        """All sources, newest first."""
+
+    @abstractmethod
+    async def list_active(self, method: str) -> list[dict]: ...
+
+    @abstractmethod
+    async def get(self, id: str) -> dict | None: ...
+
+    @abstractmethod
+    async def create(self, values: dict) -> dict: ...
+
+    @abstractmethod
+    async def delete(self, id: str) -> None: ...
+
+    @abstractmethod
+    async def mark_synced(self, id: str, synced_at: str) -> None: ...
+
+    # ── Scheduling (app.services.scheduler) ───────────────────────────────
+    @abstractmethod
+    async def due(self, now: datetime, limit: int) -> list[dict]:
+        """Active sources whose next_sync_at is unset or not after `now`, soonest first."""
+
+    @abstractmethod
+    async def acquire_lease(
+        self, id: str, owner: str, now: datetime, expires_at: datetime, *, only_if_due: bool = False,
+    ) -> bool:
+        """Take or extend the source's lease unless another owner holds one
+        that hasn't expired. With only_if_due, also unless next_sync_at is
+        after `now` (someone synced it since it was listed as due)."""
+
+    @abstractmethod
+    async def release_lease(
+        self, id: str, owner: str, next_sync_at: datetime | None = None, interval_seconds: int | None = None,
+    ) -> None:
+        """Drop `owner`'s lease, storing the next due time and interval when given."""
+
+    # ── HTTP validators ───────────────────────────────────────────────────
+    @abstractmethod
+    async def get_validators(self, url: str) -> dict:
+        """Cached {"etag", "last_modified"} for a polled URL (empty if none)."""
+
+    @abstractmethod
+    async def save_validators(self, url: str, validators: dict) -> None:
+        """Store validators for `url`; a no-op when the response sent none."""
+
+
+@dataclass
+class Storage:
+    postmortems: PostmortemRepository
+    sources: SourceRepository
+
+    async def close(self) -> None:
+        close = getattr(self.postmortems, "close", None)
+        if close:
+            await close()
@@ -0,0 +1,629 @@
+"""
+Embedded SQLite storage backend.
+
+One file, WAL journal (readers never block the writer, so the API, the sync
+script and the workers can share it), FTS5 for search, and the same
+composite indexes as the Postgres migrations. Calls run in a worker thread
+over a single connection guarded by a lock.
+
+Intended for local runs, load tests and offline profiling; analytics are
+aggregated on read instead of from rollup tables.
+"""
+
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from app.db.repository import PostmortemRepository, SourceRepository, Storage
+
+_SCHEMA = """
+create table if not exists postmortems (
+  id                  text primary key,
+  company             text not null,
+  title               text not null,
+  url                 text not null,
+  source_url          text,
+  published_at        text,
+  severity            text,
+  affected_services   text not null default '[]',
+  root_cause_category text,
+  ai_summary          text,
+  tags                text not null default '[]',
+  status              text not null default 'pending',
+  created_at          text not null default (strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now')),
+  summary_status      text,
+  summary_started_at  text,
+  fingerprint         text,
+  duplicate_of        text references postmortems(id) on delete set null
+);
+create index if not exists idx_postmortems_status_published_id on postmortems(status, published_at desc, id desc);
+create index if not exists idx_postmortems_status_company_published_id on postmortems(status, company, published_at desc, id desc);
+create index if not exists idx_postmortems_status_created_id on postmortems(status, created_at desc, id desc);
+create index if not exists idx_postmortems_missing_summary on postmortems(id) where ai_summary is null;
+create index if not exists idx_postmortems_duplicate_of on postmortems(duplicate_of) where duplicate_of is not null;
+
+create table if not exists postmortem_bands (
+  band_key      text not null,
+  postmortem_id text not null references postmortems(id) on delete cascade,
+  primary key (band_key, postmortem_id)
+) without rowid;
+
+create virtual table if not exists postmortems_fts using fts5(
+  title, facets, ai_summary,
+  content='postmortems', content_rowid='rowid', tokenize='porter unicode61'
+);
+create trigger if not exists postmortems_fts_insert after insert on postmortems begin
+  insert into postmortems_fts(rowid, title, facets, ai_summary)
+  values (new.rowid, new.title,
+          new.tags || ' ' || new.affected_services || ' ' || coalesce(new.root_cause_category, ''),
+          coalesce(new.ai_summary, ''));
+end;
+create trigger if not exists postmortems_fts_delete after delete on postmortems begin
+  insert into postmortems_fts(postmortems_fts, rowid, title, facets, ai_summary)
+  values ('delete', old.rowid, old.title,
+          old.tags || ' ' || old.affected_services || ' ' || coalesce(old.root_cause_category, ''),
+          coalesce(old.ai_summary, ''));
+end;
+create trigger if not exists postmortems_fts_update
+after update of title, tags, affected_services, root_cause_category, ai_summary on postmortems begin
+  insert into postmortems_fts(postmortems_fts, rowid, title, facets, ai_summary)
+  values ('delete', old.rowid, old.title,
+          old.tags || ' ' || old.affected_services || ' ' || coalesce(old.root_cause_category, ''),
+          coalesce(old.ai_summary, ''));
+  insert into postmortems_fts(rowid, title, facets, ai_summary)
+  values (new.rowid, new.title,
+          new.tags || ' ' || new.affected_services || ' ' || coalesce(new.root_cause_category, ''),
+          coalesce(new.ai_summary, ''));
+end;
+
+create table if not exists sources (
+  id             text primary key,
+  company        text not null,
+  slug           text not null unique,
+  method         text not null default 'github_json',
+  config         text not null default '{}',
+  active         integer not null default 1,
+  last_synced_at text,
+  created_at     text not null default (strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now')),
+  sync_interval_seconds integer,
+  next_sync_at          text,
+  lease_owner           text,
+  lease_expires_at      text
+);
+create index if not exists idx_sources_due on sources(next_sync_at) where active = 1;
+
+create table if not exists http_validators (
+  url           text primary key,
+  etag          text,
+  last_modified text,
+  updated_at    text
+);
+"""
+
+# Columns added after a table was first created, for existing database files
+_ADDED_COLUMNS = {
+    "postmortems": [
+        ("fingerprint", "text"),
+        ("duplicate_of", "text references postmortems(id) on delete set null"),
+    ],
+    "sources": [
+        ("sync_interval_seconds", "integer"),
+        ("next_sync_at", "text"),
+        ("lease_owner", "text"),
+        ("lease_expires_at", "text"),
+    ],
+}
+
+_COLUMNS = (
+    "id", "company", "title", "url", "source_url", "published_at", "severity",
+    "affected_services", "root_cause_category", "ai_summary", "tags", "status",
+    "created_at", "summary_status", "summary_started_at", "fingerprint", "duplicate_of",
+)
+_JSON_COLUMNS = {"affected_services", "tags"}
+_TIMESTAMP_COLUMNS = {"published_at", "created_at", "summary_started_at"}
+_SORTABLE = {"published_at", "company", "created_at"}
+_SUMMARY_COLUMNS = "id, title, company, severity, published_at, affected_services, root_cause_category, tags"
+
+
+def _timestamp(value) -> str | None:
+    """Normalise to fixed-width UTC ISO 8601 so timestamps sort correctly as text."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return str(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+
+def _encode(row: dict) -> dict:
+    out = {}
+    for key, value in row.items():
+        if key not in _COLUMNS:
+            continue
+        if key in _JSON_COLUMNS:
+            value = json.dumps(value or [])
+        elif key in _TIMESTAMP_COLUMNS:
+            value = _timestamp(value)
+        out[key] = value
+    return out
+
+
+def _decode(row: sqlite3.Row) -> dict:
+    out = dict(row)
+    for key in _JSON_COLUMNS & out.keys():
+        out[key] = json.loads(out[key] or "[]")
+    return out
+
+
+def _select(fields) -> str:
+    if fields is None:
+        return "*"
+    unknown = set(fields) - set(_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    return ", ".join(fields)
+
+
+def _fts_query(q: str) -> str:
+    """Turn free text into a safe FTS5 query: quoted phrases and terms, ANDed."""
+    parts = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\w+)', q):
+        text = phrase or word
+        if text:
+            parts.append('"' + text.replace('"', "") + '"')
+    return " ".join(parts)
+
+
+class _Connection:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("pragma journal_mode = wal")
+            self._conn.execute("pragma synchronous = normal")
+            self._conn.execute("pragma foreign_keys = on")
+            for table, columns in _ADDED_COLUMNS.items():
+                existing = {row["name"] for row in self._conn.execute(f"pragma table_info({table})")}
+                for name, kind in columns:
+                    if existing and name not in existing:
+                        self._conn.execute(f"alter table {table} add column {name} {kind}")
+            self._conn.executescript(_SCHEMA)
+
+    def _run(self, fn):
+        with self._lock:
+            return fn(self._conn)
+
+    async def run(self, fn):
+        return await asyncio.to_thread(self._run, fn)
+
+    async def fetchall(self, sql: str, params=()) -> list[dict]:
+        return await self.run(lambda c: [_decode(r) for r in c.execute(sql, params).fetchall()])
+
+    async def fetchone(self, sql: str, params=()) -> dict | None:
+        rows = await self.fetchall(sql, params)
+        return rows[0] if rows else None
+
+    async def execute(self, sql: str, params=()) -> int:
+        return await self.run(lambda c: c.execute(sql, params).rowcount)
+
+    async def executemany(self, sql: str, rows: list) -> None:
+        await self.executebatches([(sql, rows)])
+
+    async def executebatches(self, batches: list[tuple[str, list]]) -> None:
+        """Run several executemany calls in one transaction."""
+        def write(c):
+            c.execute("begin")
+            try:
+                for sql, rows in batches:
+                    c.executemany(sql, rows)
+                c.execute("commit")
+            except BaseException:
+                c.execute("rollback")
+                raise
+        await self.run(write)
+
+    async def close(self) -> None:
+        await self.run(lambda c: c.close())
+
+
+class SQLitePostmortemRepository(PostmortemRepository):
+    def __init__(self, conn: _Connection):
+        self.conn = conn
+
+    async def close(self) -> None:
+        await self.conn.close()
+
+    async def list_published(
+        self, *, company, severity, sort_by, desc, limit, offset=0, after=None, count="exact", fields=None,
+    ):
+        if sort_by not in _SORTABLE:
+            raise ValueError(f"Unsupported sort column: {sort_by}")
+
+        where = ["status = 'published'"]
+        params: list = []
+        if company:
+            where.append("company = ?")
+            params.append(company)
+        if severity:
+            where.append("severity = ?")
+            params.append(severity)
+        filters = " and ".join(where)
+        filter_params = list(params)
+
+        # Same ordering as Postgres defaults: nulls first descending, last ascending
+        op = "<" if desc else ">"
+        if after is not None:
+            value, last_id = after
+            if sort_by in _TIMESTAMP_COLUMNS:
+                value = _timestamp(value)
+            if value is None and desc:
+                where.append(f"(({sort_by} is null and id {op} ?) or {sort_by} is not null)")
+                params.append(last_id)
+            elif value is None:
+                where.append(f"{sort_by} is null and id > ?")
+                params.append(last_id)
+            else:
+                tail = "" if desc else f" or {sort_by} is null"
+                where.append(f"({sort_by} {op} ? or ({sort_by} = ? and id {op} ?){tail})")
+                params += [value, value, last_id]
+
+        direction = "desc nulls first" if desc else "asc nulls last"
+        id_direction = "desc" if desc else "asc"
+        sql = (
+            f"select {_select(fields)} from postmortems where {' and '.join(where)} "
+            f"order by {sort_by} {direction}, id {id_direction} limit ?"
+        )
+        params.append(limit)
+        if after is None:
+            sql += " offset ?"
+            params.append(offset)
+
+        rows = await self.conn.fetchall(sql, params)
+        total = 0
+        if count != "none":
+            # planned / estimated have no cheaper equivalent here; count exactly
+            row = await self.conn.fetchone(f"select count(*) as n from postmortems where {filters}", filter_params)
+            total = row["n"]
+        return rows, total
+
+    async def get(self, id):
+        return await self.conn.fetchone("select * from postmortems where id = ?", (id,))
+
+    async def get_many(self, ids, *, fields=None):
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        return await self.conn.fetchall(f"select {_select(fields)} from postmortems where id in ({marks})", ids)
+
+    async def search(self, q, *, company, severity, limit, offset):
+        match = _fts_query(q)
+        if not match:
+            return {"total": 0, "data": [], "facets": {}}
+
+        where = ["postmortems_fts match ?", "p.status = 'published'"]
+        params: list = [match]
+        if company:
+            where.append("p.company = ?")
+            params.append(company)
+        if severity:
+            where.append("p.severity = ?")
+            params.append(severity)
+
+        matches = f"""
+            with matches as (
+              select p.*, -bm25(postmortems_fts, 10.0, 4.0, 1.0) as rank
+              from postmortems_fts join postmortems p on p.rowid = postmortems_fts.rowid
+              where {' and '.join(where)}
+            )
+        """
+
+        def run(c):
+            total = c.execute(f"{matches} select count(*) from matches", params).fetchone()[0]
+            data = [_decode(r) for r in c.execute(
+                f"{matches} select id, title, company, url, published_at, severity, tags, affected_services, "
+                f"root_cause_category, rank from matches "
+                f"order by rank desc, published_at desc nulls last limit ? offset ?",
+                [*params, limit, offset],
+            ).fetchall()]
+
+            def facet(column_sql: str, source: str = "matches") -> list[dict]:
+                return [
+                    {"value": r[0], "count": r[1]}
+                    for r in c.execute(
+                        f"{matches} select {column_sql} as value, count(*) as n from {source} "
+                        f"where value is not null group by value order by n desc limit 20",
+                        params,
+                    ).fetchall()
+                ]
+
+            facets = {
+                "company": facet("company"),
+                "severity": facet("severity"),
+                "root_cause_category": facet("root_cause_category"),
+                "tag": facet("j.value", "matches, json_each(matches.tags) as j"),
+            }
+            return {"total": total, "data": data, "facets": facets}
+
+        return await self.conn.run(run)
+
+    async def stats(self, *, company, since, top_tags):
+        where = ["status = 'published'"]
+        params: list = []
+        if company:
+            where.append("company = ?")
+            params.append(company)
+        published = " and ".join(where)
+        company_params = list(params)
+
+        monthly_where = published + " and published_at is not null"
+        monthly_params = list(params)
+        if since:
+            monthly_where += " and published_at >= ?"
+            monthly_params.append(_timestamp(since))
+
+        def run(c):
+            monthly = [dict(r) for r in c.execute(
+                f"select company, coalesce(severity, 'unknown') as severity, "
+                f"substr(published_at, 1, 7) || '-01' as month, count(*) as count "
+                f"from postmortems where {monthly_where} group by 1, 2, 3 order by month",
+                monthly_params,
+            ).fetchall()]
+            tags = [dict(r) for r in c.execute(
+                "select j.value as tag, count(distinct p.id) as count "
+                "from postmortems p, json_each(p.tags) as j where p.status = 'published' and j.value <> '' "
+                "group by j.value order by count desc limit ?",
+                (top_tags,),
+            ).fetchall()]
+            companies = [dict(r) for r in c.execute(
+                f"select company, count(*) as count, min(published_at) as first_at, max(published_at) as last_at, "
+                f"(julianday(max(published_at)) - julianday(min(published_at))) / nullif(count(*) - 1, 0) "
+                f"as mean_days_between from postmortems where {published} group by company order by count desc",
+                company_params,
+            ).fetchall()]
+            return {"monthly": monthly, "top_tags": tags, "companies": companies}
+
+        return await self.conn.run(run)
+
+    async def list_by_status(
+        self, status, *, limit, after=None, count="exact", fields=None, company=None, severity=None,
+    ):
+        filters, params = "status = ?", [status]
+        if company:
+            filters += " and company = ?"
+            params.append(company)
+        if severity:
+            filters += " and severity = ?"
+            params.append(severity)
+        filter_params = list(params)
+
+        where = filters
+        if after is not None:
+            created_at, last_id = after
+            where += " and (created_at < ? or (created_at = ? and id < ?))"
+            params += [_timestamp(created_at), _timestamp(created_at), last_id]
+        rows = await self.conn.fetchall(
+            f"select {_select(fields)} from postmortems where {where} "
+            "order by created_at desc, id desc limit ?",
+            [*params, limit],
+        )
+        total = 0
+        if count != "none":
+            row = await self.conn.fetchone(f"select count(*) as n from postmortems where {filters}", filter_params)
+            total = row["n"]
+        return rows, total
+
+    async def set_status(self, ids, status):
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+
+        def run(c):
+            c.execute(f"update postmortems set status = ? where id in ({marks})", [status, *ids])
+            return [_decode(r) for r in c.execute(f"select * from postmortems where id in ({marks})", ids)]
+
+        return await self.conn.run(run)
+
+    async def delete(self, id):
+        await self.conn.execute("delete from postmortems where id = ?", (id,))
+
+    async def existing_ids(self, ids):
+        if not ids:
+            return set()
+        marks = ",".join("?" * len(ids))
+        rows = await self.conn.fetchall(f"select id from postmortems where id in ({marks})", ids)
+        return {row["id"] for row in rows}
+
+    async def _write(self, rows: list[dict], update: bool) -> None:
+        # Rows may carry different keys; each column set gets its own statement
+        # so a missing key keeps the column's default (or, on update, its value)
+        # rather than becoming null
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for row in map(_encode, rows):
+            groups.setdefault(tuple(row), []).append(row)
+        batches = []
+        for columns, group in groups.items():
+            assignments = ", ".join(f"{col} = excluded.{col}" for col in columns if col != "id")
+            on_conflict = f"do update set {assignments}" if update and assignments else "do nothing"
+            sql = (
+                f"insert into postmortems ({', '.join(columns)}) values ({', '.join('?' * len(columns))}) "
+                f"on conflict(id) {on_conflict}"
+            )
+            batches.append((sql, [list(row.values()) for row in group]))
+        if batches:
+            await self.conn.executebatches(batches)
+
+    async def insert_new(self, rows):
+        await self._write(rows, update=False)
+
+    async def upsert(self, rows):
+        # An upsert rather than "insert or replace", which deletes the old row
+        # without firing the FTS delete trigger
+        await self._write(rows, update=True)
+        return [await self.get(row["id"]) for row in rows]
+
+    async def update(self, id, values):
+        encoded = _encode(values)
+        if not encoded:
+            return
+        assignments = ", ".join(f"{col} = ?" for col in encoded)
+        await self.conn.execute(f"update postmortems set {assignments} where id = ?", [*encoded.values(), id])
+
+    async def fingerprint_candidates(self, band_keys):
+        if not band_keys:
+            return []
+        marks = ",".join("?" * len(band_keys))
+        return await self.conn.fetchall(
+            "select id, company, published_at, fingerprint, duplicate_of from postmortems "
+            f"where id in (select postmortem_id from postmortem_bands where band_key in ({marks})) "
+            "and fingerprint is not null",
+            band_keys,
+        )
+
+    async def add_fingerprint_bands(self, bands):
+        if bands:
+            await self.conn.executemany(
+                "insert into postmortem_bands (band_key, postmortem_id) values (?, ?) on conflict do nothing",
+                bands,
+            )
+
+    async def set_summary(self, id, summary, *, only_if_missing=False):
+        sql = "update postmortems set ai_summary = ?, summary_status = null where id = ?"
+        if only_if_missing:
+            sql += " and ai_summary is null"
+        await self.conn.execute(sql, (summary, id))
+
+    async def set_summaries(self, summaries):
+        if not summaries:
+            return []
+        values = ", ".join("(?, ?)" for _ in summaries)
+        rows = await self.conn.fetchall(
+            f"update postmortems set ai_summary = v.column2, summary_status = null from (values {values}) as v "
+            "where postmortems.id = v.column1 and postmortems.ai_summary is null returning postmortems.id",
+            [value for pair in summaries for value in pair],
+        )
+        return [row["id"] for row in rows]
+
+    async def claim_summary(self, id, stale_before):
+        claimed = await self.conn.execute(
+            "update postmortems set summary_status = 'generating', summary_started_at = ? "
+            "where id = ? and ai_summary is null and (summary_status is null or summary_started_at < ?)",
+            (_timestamp(datetime.now(timezone.utc)), id, _timestamp(stale_before)),
+        )
+        return claimed > 0
+
+    async def release_summary_claim(self, id):
+        await self.conn.execute("update postmortems set summary_status = null where id = ?", (id,))
+
+    async def summary_state(self, id):
+        return await self.conn.fetchone("select ai_summary, summary_status from postmortems where id = ?", (id,))
+
+    async def pending_summaries(self, after_id, limit, *, stale_before=None):
+        sql = f"select {_SUMMARY_COLUMNS} from postmortems where ai_summary is null and status <> 'rejected' and id > ?"
+        params: list = [after_id or ""]
+        if stale_before is not None:
+            sql += " and (summary_status is null or summary_started_at < ?)"
+            params.append(_timestamp(stale_before))
+        return await self.conn.fetchall(sql + " order by id limit ?", [*params, limit])
+
+    async def count_pending_summaries(self):
+        row = await self.conn.fetchone(
+            "select count(*) as n from postmortems where ai_summary is null and status <> 'rejected'"
+        )
+        return row["n"]
+
+
+class SQLiteSourceRepository(SourceRepository):
+    def __init__(self, conn: _Connection):
+        self.conn = conn
+
+    @staticmethod
+    def _decode(row: dict | None) -> dict | None:
+        if row is None:
+            return None
+        row["config"] = json.loads(row["config"] or "{}")
+        row["active"] = bool(row["active"])
+        return row
+
+    async def list_all(self):
+        rows = await self.conn.fetchall("select * from sources order by created_at desc")
+        return [self._decode(row) for row in rows]
+
+    async def list_active(self, method):
+        rows = await self.conn.fetchall("select * from sources where method = ? and active = 1", (method,))
+        return [self._decode(row) for row in rows]
+
+    async def get(self, id):
+        return self._decode(await self.conn.fetchone("select * from sources where id = ?", (id,)))
+
+    async def create(self, values):
+        id = str(uuid.uuid4())
+        await self.conn.execute(
+            "insert into sources (id, company, slug, method, config, active) values (?, ?, ?, ?, ?, ?)",
+            (id, values["company"], values["slug"], values.get("method", "github_json"),
+             json.dumps(values.get("config") or {}), int(values.get("active", True))),
+        )
+        return await self.get(id)
+
+    async def delete(self, id):
+        await self.conn.execute("delete from sources where id = ?", (id,))
+
+    async def mark_synced(self, id, synced_at):
+        await self.conn.execute("update sources set last_synced_at = ? where id = ?", (_timestamp(synced_at), id))
+
+    async def due(self, now, limit):
+        rows = await self.conn.fetchall(
+            "select * from sources where active = 1 and (next_sync_at is null or next_sync_at <= ?) "
+            "order by next_sync_at nulls first limit ?",
+            (_timestamp(now), limit),
+        )
+        return [self._decode(row) for row in rows]
+
+    async def acquire_lease(self, id, owner, now, expires_at, *, only_if_due=False):
+        sql = (
+            "update sources set lease_owner = ?, lease_expires_at = ? "
+            "where id = ? and (lease_expires_at is null or lease_expires_at < ? or lease_owner = ?)"
+        )
+        params = [owner, _timestamp(expires_at), id, _timestamp(now), owner]
+        if only_if_due:
+            sql += " and (next_sync_at is null or next_sync_at <= ?)"
+            params.append(_timestamp(now))
+        return await self.conn.execute(sql, params) > 0
+
+    async def release_lease(self, id, owner, next_sync_at=None, interval_seconds=None):
+        await self.conn.execute(
+            "update sources set lease_owner = null, lease_expires_at = null, "
+            "next_sync_at = coalesce(?, next_sync_at), sync_interval_seconds = coalesce(?, sync_interval_seconds) "
+            "where id = ? and lease_owner = ?",
+            (_timestamp(next_sync_at), interval_seconds, id, owner),
+        )
+
+    async def get_validators(self, url):
+        row = await self.conn.fetchone("select etag, last_modified from http_validators where url = ?", (url,))
+        return row or {}
+
+    async def save_validators(self, url, validators):
+        if not validators:
+            return
+        await self.conn.execute(
+            "insert or replace into http_validators (url, etag, last_modified, updated_at) values (?, ?, ?, ?)",
+            (url, validators.get("etag"), validators.get("last_modified"), datetime.now(timezone.utc).isoformat()),
+        )
+
+
+def open_sqlite(path: str) -> Storage:
+    conn = _Connection(path)
+    return Storage(
+        postmortems=SQLitePostmortemRepository(conn),
+        sources=SQLiteSourceRepository(conn),
+    )
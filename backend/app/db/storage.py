@@ -0,0 +1,100 @@
+"""
+Storage backend selection.
+
+`open_storage` builds a Storage for an explicit backend and is safe to use
+from scripts (no app settings needed); `get_storage` is the app-wide
+instance configured by `settings.storage_backend`.
+
+Every repository call is timed into the db operation metrics, labelled
+with the backend, table and method name.
+"""
+
+import functools
+import inspect
+import os
+
+from app.db.repository import Storage
+from app.services import metrics
+
+_storage: Storage | None = None
+
+
+class _Timed:
+    """Proxy that times the async methods of a repository."""
+
+    def __init__(self, repo, backend: str, table: str):
+        self._repo = repo
+        self._labels = {"backend": backend, "table": table}
+
+    def __getattr__(self, name):
+        attr = getattr(self._repo, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def timed(*args, **kwargs):
+            try:
+                with metrics.db_operation_seconds.time(operation=name, **self._labels):
+                    return await attr(*args, **kwargs)
+            except Exception:
+                metrics.db_operation_errors.inc(operation=name, **self._labels)
+                raise
+
+        setattr(self, name, timed)
+        return timed
+
+
+def _instrument(storage: Storage, backend: str) -> Storage:
+    return Storage(
+        postmortems=_Timed(storage.postmortems, backend, "postmortems"),
+        sources=_Timed(storage.sources, backend, "sources"),
+    )
+
+
+async def open_storage(
+    backend: str,
+    *,
+    supabase_url: str = "",
+    supabase_key: str = "",
+    sqlite_path: str = "continuum.db",
+) -> Storage:
+    if backend == "sqlite":
+        from app.db.sqlite import open_sqlite
+        return _instrument(open_sqlite(sqlite_path), backend)
+    if backend == "supabase":
+        if not supabase_url or not supabase_key:
+            raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set for the supabase storage backend")
+        from app.db.supabase import open_supabase
+        return _instrument(await open_supabase(supabase_url, supabase_key), backend)
+    raise RuntimeError(f"Unknown storage backend: {backend}")
+
+
+async def storage_from_env() -> Storage:
+    """Storage for standalone scripts, configured from the same env vars as the app."""
+    return await open_storage(
+        os.environ.get("STORAGE_BACKEND", "supabase"),
+        supabase_url=os.environ.get("SUPABASE_URL", ""),
+        supabase_key=os.environ.get("SUPABASE_KEY", ""),
+        sqlite_path=os.environ.get("SQLITE_PATH", "continuum.db"),
+    )
+
+
+async def get_storage() -> Storage:
+    global _storage
+    if _storage is None:
+        # Imported here so scripts can use open_storage without app settings
+        from app.core.config import settings
+        _storage = await open_storage(
+            settings.storage_backend,
+            supabase_url=settings.supabase_url,
+            supabase_key=settings.supabase_key,
+            sqlite_path=settings.sqlite_path,
+        )
+    return _storage
+
+
+async def close_storage() -> None:
+    global _storage
+    if _storage is not None:
+        await _storage.close()
+        _storage = None
@@ -1,11 +1,269 @@
+import asyncio
+from datetime import datetime, timezone
+
+from postgrest.types import ReturnMethod
 from supabase import acreate_client, AsyncClient
-from app.core.config import settings
 
-_client: AsyncClient | None = None
+from app.db import keyset
+from app.db.repository import PostmortemRepository, SourceRepository, Storage
+
+# Columns needed to build a summary prompt
+_SUMMARY_COLUMNS = "id, title, company, severity, published_at, affected_services, root_cause_category, tags"
+
+
+def _select(fields) -> str:
+    return "*" if fields is None else ", ".join(fields)
+
+
+def _count(count: str) -> str | None:
+    return None if count == "none" else count
+
+
+def _utc(dt: datetime) -> str:
+    # No "+" in the timestamp: these sit inside PostgREST logic trees
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SupabasePostmortemRepository(PostmortemRepository):
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    def _table(self):
+        return self.client.table("postmortems")
+
+    async def list_published(
+        self, *, company, severity, sort_by, desc, limit, offset=0, after=None, count="exact", fields=None,
+    ):
+        query = self._table().select(_select(fields), count=_count(count)).eq("status", "published")
+        if company:
+            query = query.eq("company", company)
+        if severity:
+            query = query.eq("severity", severity)
+
+        if after is not None:
+            query = keyset.after(query, sort_by, desc, *after).limit(limit)
+        else:
+            query = query.range(offset, offset + limit - 1)
+
+        result = await keyset.order(query, sort_by, desc).execute()
+        return result.data, result.count or 0
+
+    async def get(self, id):
+        result = await self._table().select("*").eq("id", id).limit(1).execute()
+        return result.data[0] if result.data else None
+
+    async def get_many(self, ids, *, fields=None):
+        if not ids:
+            return []
+        result = await self._table().select(_select(fields)).in_("id", ids).execute()
+        return result.data
+
+    async def search(self, q, *, company, severity, limit, offset):
+        # search_postmortems RPC: migration 006
+        result = await self.client.rpc("search_postmortems", {
+            "q":               q,
+            "filter_company":  company,
+            "filter_severity": severity,
+            "result_limit":    limit,
+            "result_offset":   offset,
+        }).execute()
+        return result.data or {"total": 0, "data": [], "facets": {}}
+
+    async def stats(self, *, company, since, top_tags):
+        # Rollup tables: migration 007
+        monthly = self.client.table("rollup_monthly").select("company, severity, month, count")
+        companies = self.client.table("rollup_company_stats").select("*")
+        if company:
+            monthly = monthly.eq("company", company)
+            companies = companies.eq("company", company)
+        if since:
+            monthly = monthly.gte("month", since)
+
+        monthly_res, tags_res, companies_res = await asyncio.gather(
+            monthly.order("month").execute(),
+            self.client.table("rollup_tags").select("tag, count").order("count", desc=True).limit(top_tags).execute(),
+            companies.order("count", desc=True).execute(),
+        )
+        return {"monthly": monthly_res.data, "top_tags": tags_res.data, "companies": companies_res.data}
+
+    async def list_by_status(
+        self, status, *, limit, after=None, count="exact", fields=None, company=None, severity=None,
+    ):
+        query = self._table().select(_select(fields), count=_count(count)).eq("status", status)
+        if company:
+            query = query.eq("company", company)
+        if severity:
+            query = query.eq("severity", severity)
+        if after is not None:
+            query = keyset.after(query, "created_at", True, *after)
+        result = await keyset.order(query, "created_at", True).limit(limit).execute()
+        return result.data, result.count or 0
+
+    async def set_status(self, ids, status):
+        result = await self._table().update({"status": status}).in_("id", ids).execute()
+        return result.data
+
+    async def delete(self, id):
+        await self._table().delete().eq("id", id).execute()
+
+    async def existing_ids(self, ids):
+        result = await self._table().select("id").in_("id", ids).execute()
+        return {row["id"] for row in result.data}
+
+    async def insert_new(self, rows):
+        await self._table().upsert(
+            rows,
+            on_conflict="id",
+            ignore_duplicates=True,
+            returning=ReturnMethod.minimal,
+        ).execute()
+
+    async def upsert(self, rows):
+        result = await self._table().upsert(rows).execute()
+        return result.data
+
+    async def update(self, id, values):
+        await self._table().update(values).eq("id", id).execute()
+
+    async def fingerprint_candidates(self, band_keys):
+        if not band_keys:
+            return []
+        # fingerprint_candidates: migration 009
+        result = await self.client.rpc("fingerprint_candidates", {"band_keys": band_keys}).execute()
+        return result.data or []
+
+    async def add_fingerprint_bands(self, bands):
+        if not bands:
+            return
+        await self.client.table("postmortem_bands").upsert(
+            [{"band_key": key, "postmortem_id": id} for key, id in bands],
+            on_conflict="band_key,postmortem_id",
+            ignore_duplicates=True,
+            returning=ReturnMethod.minimal,
+        ).execute()
+
+    async def set_summary(self, id, summary, *, only_if_missing=False):
+        query = self._table().update({"ai_summary": summary, "summary_status": None}).eq("id", id)
+        if only_if_missing:
+            query = query.is_("ai_summary", "null")
+        await query.execute()
+
+    async def set_summaries(self, summaries):
+        if not summaries:
+            return []
+        # set_summaries: migration 010
+        ids, texts = zip(*summaries)
+        result = await self.client.rpc("set_summaries", {"ids": list(ids), "summaries": list(texts)}).execute()
+        return [row["id"] for row in result.data or []]
+
+    async def claim_summary(self, id, stale_before):
+        stale = _utc(stale_before)
+        result = await self._table().update({
+            "summary_status":     "generating",
+            "summary_started_at": datetime.now(timezone.utc).isoformat(),
+        }).eq("id", id).is_("ai_summary", "null").or_(
+            f"summary_status.is.null,summary_started_at.lt.{stale}"
+        ).execute()
+        return bool(result.data)
+
+    async def release_summary_claim(self, id):
+        await self._table().update({"summary_status": None}).eq("id", id).execute()
+
+    async def summary_state(self, id):
+        result = await self._table().select("ai_summary, summary_status").eq("id", id).execute()
+        return result.data[0] if result.data else None
+
+    def _pending(self, columns: str, **kwargs):
+        return self._table().select(columns, **kwargs).is_("ai_summary", "null").neq("status", "rejected")
+
+    async def pending_summaries(self, after_id, limit, *, stale_before=None):
+        query = self._pending(_SUMMARY_COLUMNS)
+        if after_id:
+            query = query.gt("id", after_id)
+        if stale_before is not None:
+            query = query.or_(f"summary_status.is.null,summary_started_at.lt.{_utc(stale_before)}")
+        result = await query.order("id").limit(limit).execute()
+        return result.data
+
+    async def count_pending_summaries(self):
+        result = await self._pending("id", count="exact").limit(1).execute()
+        return result.count or 0
+
+
+class SupabaseSourceRepository(SourceRepository):
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    def _table(self):
+        return self.client.table("sources")
+
+    async def list_all(self):
+        result = await self._table().select("*").order("created_at", desc=True).execute()
+        return result.data
+
+    async def list_active(self, method):
+        result = await self._table().select("*").eq("method", method).eq("active", True).execute()
+        return result.data
+
+    async def get(self, id):
+        result = await self._table().select("*").eq("id", id).execute()
+        return result.data[0] if result.data else None
+
+    async def create(self, values):
+        result = await self._table().insert(values).execute()
+        return result.data[0]
+
+    async def delete(self, id):
+        await self._table().delete().eq("id", id).execute()
+
+    async def mark_synced(self, id, synced_at):
+        await self._table().update({"last_synced_at": synced_at}).eq("id", id).execute()
+
+    async def due(self, now, limit):
+        # Schedule columns: migration 008
+        result = await self._table().select("*").eq("active", True).or_(
+            f"next_sync_at.is.null,next_sync_at.lte.{_utc(now)}"
+        ).order("next_sync_at", nullsfirst=True).limit(limit).execute()
+        return result.data
+
+    async def acquire_lease(self, id, owner, now, expires_at, *, only_if_due=False):
+        free = f"or(lease_expires_at.is.null,lease_expires_at.lt.{_utc(now)},lease_owner.eq.\"{owner}\")"
+        if only_if_due:
+            # Both conditions in one logic tree: a second or= parameter isn't ANDed reliably
+            free = f"and({free},or(next_sync_at.is.null,next_sync_at.lte.{_utc(now)}))"
+        result = await self._table().update({
+            "lease_owner":      owner,
+            "lease_expires_at": expires_at.isoformat(),
+        }).eq("id", id).or_(free).execute()
+        return bool(result.data)
+
+    async def release_lease(self, id, owner, next_sync_at=None, interval_seconds=None):
+        values = {"lease_owner": None, "lease_expires_at": None}
+        if next_sync_at is not None:
+            values["next_sync_at"] = next_sync_at.isoformat()
+        if interval_seconds is not None:
+            values["sync_interval_seconds"] = interval_seconds
+        await self._table().update(values).eq("id", id).eq("lease_owner", owner).execute()
+
+    async def get_validators(self, url):
+        # http_validators: migration 003
+        result = await self.client.table("http_validators").select("etag, last_modified").eq("url", url).execute()
+        return result.data[0] if result.data else {}
+
+    async def save_validators(self, url, validators):
+        if not validators:
+            return
+        await self.client.table("http_validators").upsert({
+            "url":           url,
+            "etag":          validators.get("etag"),
+            "last_modified": validators.get("last_modified"),
+            "updated_at":    datetime.now(timezone.utc).isoformat(),
+        }, on_conflict="url").execute()
 
 
-async def get_client() -> AsyncClient:
-    global _client
-    if _client is None:
-        _client = await acreate_client(settings.supabase_url, settings.supabase_key)
-    return _client
+async def open_supabase(url: str, key: str) -> Storage:
+    client = await acreate_client(url, key)
+    return Storage(
+        postmortems=SupabasePostmortemRepository(client),
+        sources=SupabaseSourceRepository(client),
+    )
@@ -2,11 +2,47 @@ import os
 import certifi
 os.environ.setdefault("SSL_CERT_FILE", certifi.where())
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from app.api import postmortems, admin, sources
+from app.core.config import settings
+from app.db.storage import close_storage, get_storage
+from app.services import bulk_jobs, compression, groq, llm_cache, metrics, scheduler, similar, summary_worker
 
-app = FastAPI(title="Continuum API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await groq.open_client()
+    tasks = []
+    if settings.summary_worker_enabled:
+        app.state.summary_worker = summary_worker.from_settings((await get_storage()).postmortems)
+        tasks.append(asyncio.create_task(
+            app.state.summary_worker.run_forever(settings.summary_worker_idle_seconds)
+        ))
+    if settings.similar_enabled:
+        similar.open_index()
+        tasks.append(asyncio.create_task(
+            similar.run_forever((await get_storage()).postmortems, settings.similar_refresh_seconds)
+        ))
+    if settings.sync_scheduler_enabled:
+        app.state.sync_scheduler = scheduler.from_settings(await get_storage())
+        tasks.append(asyncio.create_task(app.state.sync_scheduler.run_forever()))
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await bulk_jobs.shutdown()
+    await groq.close_client()
+    llm_cache.close()
+    await close_storage()
+
+
+app = FastAPI(
+    title="Continuum API", version="0.1.0", lifespan=lifespan, default_response_class=ORJSONResponse,
+)
 
 origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 
@@ -17,6 +53,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.compression_enabled:
+    app.add_middleware(compression.CompressionMiddleware, minimum_size=settings.compression_min_size)
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 app.include_router(postmortems.router)
 app.include_router(admin.router)
@@ -26,3 +66,9 @@ app.include_router(sources.router)
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
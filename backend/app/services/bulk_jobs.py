@@ -0,0 +1,244 @@
+"""
+Background jobs for admin bulk status changes (publish / reject).
+
+A job targets an explicit id list or a filter ("every pending row from
+company X") and applies the change in chunks of settings.bulk_chunk_size
+ids, so no single update hits URL or statement size limits and the
+request that started it returns at once. A filter is resolved one chunk
+at a time by keyset paging on (created_at, id), so it never loads the
+whole match set either.
+
+Setting a status is idempotent, so a failed chunk is simply retried with
+backoff; a chunk that still fails is recorded in the summary and the job
+moves on. Progress is a list of events (same shape as sync events: start,
+progress, chunk_error, done) that any number of SSE subscribers replay
+and follow.
+
+Jobs live in the process that started them and the last
+settings.bulk_jobs_kept are remembered for GET /admin/jobs.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable
+
+from app.core.config import settings
+from app.db.repository import PostmortemRepository
+from app.services import similar
+
+logger = logging.getLogger(__name__)
+
+# action → status it sets
+ACTIONS = {"publish": "published", "reject": "rejected"}
+
+# Failed ids kept for the summary
+_MAX_FAILED_IDS = 100
+
+
+@dataclass
+class BulkJob:
+    id: str
+    action: str
+    target: dict                      # {"ids": count} or {"filter": {...}}
+    state: str = "running"            # running | done | failed | cancelled
+    total: int | None = None
+    updated: int = 0
+    processed: int = 0
+    chunks: int = 0
+    retries: int = 0
+    failed: int = 0
+    failed_ids: list[str] = field(default_factory=list)
+    error: str | None = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    _events: list[dict] = field(default_factory=list, repr=False)
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+    _task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.state != "running"
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "action": self.action,
+            "target": self.target,
+            "state": self.state,
+            "total": self.total,
+            "processed": self.processed,
+            "updated": self.updated,
+            "chunks": self.chunks,
+            "retries": self.retries,
+            "failed": self.failed,
+            "failed_ids": self.failed_ids,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    async def _emit(self, event: dict) -> None:
+        async with self._changed:
+            self._events.append(event)
+            self._changed.notify_all()
+
+    async def events(self) -> AsyncIterator[dict]:
+        """Every event so far, then new ones as they happen, until the job ends."""
+        seen = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: seen < len(self._events) or self.finished)
+                new = self._events[seen:]
+            for event in new:
+                yield event
+            seen += len(new)
+            if self.finished and seen == len(self._events):
+                return
+
+    async def wait(self) -> None:
+        if self._task:
+            await asyncio.shield(self._task)
+
+
+_jobs: OrderedDict[str, BulkJob] = OrderedDict()
+
+
+async def _chunks_from_ids(ids: list[str], size: int) -> AsyncIterator[list[str]]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+async def _chunks_from_filter(
+    repo: PostmortemRepository, job: BulkJob, filter: dict, size: int,
+) -> AsyncIterator[list[str]]:
+    after = None
+    while True:
+        rows, total = await repo.list_by_status(
+            filter["status"], company=filter.get("company"), severity=filter.get("severity"),
+            limit=size, after=after, count="exact" if after is None else "none", fields=("id", "created_at"),
+        )
+        if after is None:
+            job.total = total
+        if not rows:
+            return
+        yield [row["id"] for row in rows]
+        if len(rows) < size:
+            return
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+
+
+async def _apply(
+    repo: PostmortemRepository, job: BulkJob, ids: list[str], status: str, retries: int, backoff: float,
+) -> None:
+    for attempt in range(retries + 1):
+        try:
+            rows = await repo.set_status(ids, status)
+        except Exception as e:
+            if attempt == retries:
+                job.failed += len(ids)
+                room = _MAX_FAILED_IDS - len(job.failed_ids)
+                job.failed_ids.extend(ids[:max(room, 0)])
+                await job._emit({"type": "chunk_error", "chunk": job.chunks, "ids": len(ids), "message": str(e)})
+                logger.warning("Bulk %s chunk %d failed after %d attempts: %s", job.action, job.chunks, attempt + 1, e)
+                return
+            job.retries += 1
+            await asyncio.sleep(min(backoff * 2 ** attempt, 10))
+        else:
+            job.updated += len(rows)
+            await similar.update(rows)
+            return
+
+
+async def _run(
+    job: BulkJob,
+    repo: PostmortemRepository,
+    chunks: AsyncIterator[list[str]],
+    *,
+    retries: int,
+    backoff: float,
+    on_change: Callable[[], Awaitable[None]] | None,
+) -> None:
+    status = ACTIONS[job.action]
+    await job._emit({"type": "start", "job": job.id, "action": job.action, "total": job.total,
+                     "message": f"Starting bulk {job.action}"})
+    try:
+        async for ids in chunks:
+            job.chunks += 1
+            await _apply(repo, job, ids, status, retries, backoff)
+            job.processed += len(ids)
+            if on_change:
+                await on_change()
+            await job._emit({"type": "progress", "chunk": job.chunks, "processed": job.processed,
+                             "updated": job.updated, "failed": job.failed, "total": job.total})
+        job.state = "done"
+    except asyncio.CancelledError:
+        job.state = "cancelled"
+        raise
+    except Exception as e:
+        job.state, job.error = "failed", str(e)
+        logger.exception("Bulk %s job %s failed", job.action, job.id)
+    finally:
+        job.finished_at = time.time()
+        await job._emit({"type": "done", **job.as_dict(),
+                         "seconds": round(job.finished_at - job.started_at, 3)})
+
+
+def start(
+    repo: PostmortemRepository,
+    action: str,
+    *,
+    ids: list[str] | None = None,
+    filter: dict | None = None,
+    on_change: Callable[[], Awaitable[None]] | None = None,
+) -> BulkJob:
+    """Start a job for `ids` or `filter` ({"status", "company", "severity"}).
+
+    Raises ValueError for an unknown action or when neither / both
+    targets are given.
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action {action!r}; expected one of {', '.join(ACTIONS)}")
+    if (ids is None) == (filter is None):
+        raise ValueError("Give either ids or a filter")
+
+    size = settings.bulk_chunk_size
+    if ids is not None:
+        ids = list(dict.fromkeys(ids))
+        job = BulkJob(id=uuid.uuid4().hex, action=action, target={"ids": len(ids)}, total=len(ids))
+        chunks = _chunks_from_ids(ids, size)
+    else:
+        filter = {"status": "pending", **{k: v for k, v in filter.items() if v is not None}}
+        job = BulkJob(id=uuid.uuid4().hex, action=action, target={"filter": filter})
+        chunks = _chunks_from_filter(repo, job, filter, size)
+
+    job._task = asyncio.create_task(_run(
+        job, repo, chunks,
+        retries=settings.bulk_chunk_retries, backoff=settings.bulk_retry_backoff, on_change=on_change,
+    ))
+    _jobs[job.id] = job
+    while len(_jobs) > settings.bulk_jobs_kept:
+        oldest = next((j for j in _jobs.values() if j.finished), None)
+        if oldest is None:
+            break
+        del _jobs[oldest.id]
+    return job
+
+
+def get(id: str) -> BulkJob | None:
+    return _jobs.get(id)
+
+
+def list_jobs() -> list[BulkJob]:
+    """Remembered jobs, newest first."""
+    return list(reversed(_jobs.values()))
+
+
+async def shutdown() -> None:
+    tasks = [job._task for job in _jobs.values() if job._task and not job.finished]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,204 @@
+"""
+Keyword classifier for feed entries.
+
+Scores how likely an entry is an incident write-up and guesses its root
+cause category, severity and affected services from keyword tables, so
+RSS / JSON imports arrive with those fields filled instead of empty and
+no LLM call is needed at ingest.
+
+Text is tokenised once with a compiled regex and every token position is
+checked against one hash table of phrases (up to the longest phrase's
+word count), so cost grows with the text, not with the number of
+patterns, and overlapping phrases ("outage" inside "complete outage") all
+count. Tokens are lowercased and lose a plural "s" on both sides, so
+"outages" matches "outage".
+
+Tables can be overridden per source (see Classifier.with_overrides).
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:['\-.][a-z0-9]+)*")
+
+# phrase → weight; a title hit counts double
+INCIDENT_KEYWORDS: dict[str, float] = {
+    "incident": 2, "outage": 2, "postmortem": 3, "post-mortem": 3, "post mortem": 3,
+    "incident review": 3, "incident report": 3, "retrospective": 1.5, "root cause": 2,
+    "downtime": 2, "degradation": 1.5, "degraded": 1.5, "disruption": 1.5, "failure": 1,
+    "reliability": 0.5, "resilience": 0.5, "service interruption": 2, "unavailable": 1,
+    "elevated error": 1.5, "error rate": 1, "rollback": 1, "rolled back": 1, "mitigation": 1,
+    "what went wrong": 2, "lessons learned": 1.5, "sev1": 2, "sev-1": 2, "sev0": 2,
+    "on-call": 0.5, "pager": 0.5, "blameless": 1.5,
+}
+
+# category → phrases
+ROOT_CAUSES: dict[str, list[str]] = {
+    "Deployment Error": [
+        "deploy", "deployment", "release", "rollout", "bad push", "code change", "rolled back",
+        "rollback", "regression", "migration", "feature flag",
+    ],
+    "Configuration": [
+        "configuration", "config", "misconfiguration", "misconfigured", "config change", "typo",
+        "expired certificate", "certificate expiry", "certificate",
+    ],
+    "Resource Exhaustion": [
+        "connection pool", "pool exhaustion", "exhausted", "exhaustion", "out of memory", "oom",
+        "memory leak", "disk full", "capacity", "cpu saturation", "thread pool", "rate limit",
+        "traffic spike", "overload", "overloaded", "thundering herd", "cache stampede",
+    ],
+    "Network": [
+        "network", "dns", "bgp", "packet loss", "partition", "network partition", "load balancer",
+        "routing", "latency spike", "connectivity", "fiber cut", "tls handshake",
+    ],
+    "Dependency Failure": [
+        "third-party", "third party", "upstream", "dependency", "vendor", "provider outage",
+        "aws outage", "cloud provider", "external service",
+    ],
+    "Database": [
+        "database", "replication lag", "replica", "failover", "deadlock", "index corruption",
+        "query plan", "schema", "primary database", "postgres", "mysql",
+    ],
+    "Hardware": ["hardware", "disk failure", "power outage", "power failure", "data center", "datacenter"],
+    "Security": ["security", "ddos", "attack", "breach", "credential", "vulnerability", "compromised"],
+}
+
+# severity → phrases, most severe first
+SEVERITIES: dict[str, list[str]] = {
+    "critical": [
+        "complete outage", "total outage", "full outage", "all customers", "all users", "data loss",
+        "sev0", "sev1", "sev-1", "site-wide", "global outage", "entirely unavailable", "hard down",
+    ],
+    "high": [
+        "outage", "went down", "was down", "unavailable", "major incident", "widespread",
+        "most customers", "sev2",
+    ],
+    "medium": [
+        "degraded", "degradation", "elevated error", "partial outage", "increased latency",
+        "slow", "intermittent", "some customers", "some users", "sev3",
+    ],
+    "low": ["minor", "small number", "few customers", "cosmetic", "sev4"],
+}
+
+# service → phrases
+SERVICES: dict[str, list[str]] = {
+    "api": ["api", "apis", "rest api", "graphql"],
+    "auth": ["auth", "authentication", "login", "sign-in", "sso", "oauth"],
+    "checkout": ["checkout", "cart"],
+    "payments": ["payment", "billing", "invoice", "stripe"],
+    "search": ["search", "search index", "elasticsearch"],
+    "database": ["database", "postgres", "mysql", "replica"],
+    "cache": ["cache", "redis", "memcached"],
+    "cdn": ["cdn", "content delivery"],
+    "dns": ["dns"],
+    "storage": ["storage", "s3", "object storage", "blob"],
+    "notifications": ["notification", "email", "push notification", "sms", "webhook"],
+    "queue": ["queue", "kafka", "message queue", "background job"],
+    "ci/cd": ["ci", "ci pipeline", "build pipeline", "github actions"],
+    "web": ["website", "web app", "frontend", "dashboard"],
+    "mobile": ["mobile app", "ios", "android"],
+}
+
+
+def _norm(token: str) -> str:
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _tokens(text: str) -> list[str]:
+    return [_norm(t) for t in _TOKEN.findall(text.lower())]
+
+
+@dataclass
+class Classification:
+    score: float
+    root_cause_category: str | None = None
+    severity: str | None = None
+    affected_services: list[str] = field(default_factory=list)
+
+
+class Classifier:
+    def __init__(
+        self,
+        incident: dict[str, float] = INCIDENT_KEYWORDS,
+        root_causes: dict[str, list[str]] = ROOT_CAUSES,
+        severities: dict[str, list[str]] = SEVERITIES,
+        services: dict[str, list[str]] = SERVICES,
+    ):
+        self._tables = {"incident": incident, "root_causes": root_causes,
+                        "severities": severities, "services": services}
+        self._severity_rank = {name: rank for rank, name in enumerate(severities)}
+        self._cause_rank = {name: rank for rank, name in enumerate(root_causes)}
+
+        # phrase (normalised, space-joined) → [(table, label, weight)]
+        self._phrases: dict[str, list[tuple[str, str, float]]] = {}
+        for phrase, weight in incident.items():
+            self._add(phrase, "incident", phrase, weight)
+        for table, groups in (("cause", root_causes), ("severity", severities), ("service", services)):
+            for label, phrases in groups.items():
+                for phrase in phrases:
+                    self._add(phrase, table, label, 1.0)
+        self._max_words = max((key.count(" ") + 1 for key in self._phrases), default=1)
+
+    def _add(self, phrase: str, table: str, label: str, weight: float) -> None:
+        key = " ".join(_tokens(phrase))
+        if key:
+            self._phrases.setdefault(key, []).append((table, label, weight))
+
+    def with_overrides(self, overrides: dict | None) -> "Classifier":
+        """A classifier with some tables replaced, e.g. from a source's config.
+
+        `overrides` may hold any of incident, root_causes, severities and
+        services; a plain list for incident means weight 1 per phrase.
+        """
+        if not overrides:
+            return self
+        tables = dict(self._tables)
+        for name, table in overrides.items():
+            if name not in tables:
+                raise ValueError(f"Unknown classifier table {name!r}")
+            if name == "incident" and isinstance(table, list):
+                table = {phrase: 1.0 for phrase in table}
+            tables[name] = table
+        return Classifier(**tables)
+
+    def classify(self, title: str, body: str = "", tags: list[str] | None = None) -> Classification:
+        title_tokens = _tokens(title)
+        tokens = title_tokens + _tokens(body) + _tokens(" ".join(tags or []))
+        in_title = len(title_tokens)
+
+        incident_hits: dict[str, float] = {}
+        causes: dict[str, int] = {}
+        severity = None
+        services: dict[str, None] = {}
+
+        for i in range(len(tokens)):
+            key = ""
+            for n in range(min(self._max_words, len(tokens) - i)):
+                key = tokens[i] if n == 0 else f"{key} {tokens[i + n]}"
+                for table, label, weight in self._phrases.get(key, ()):
+                    if table == "incident":
+                        weight *= 2 if i < in_title else 1
+                        incident_hits[label] = max(incident_hits.get(label, 0), weight)
+                    elif table == "cause":
+                        causes[label] = causes.get(label, 0) + 1
+                    elif table == "severity":
+                        if severity is None or self._severity_rank[label] < self._severity_rank[severity]:
+                            severity = label
+                    else:
+                        services.setdefault(label)
+
+        cause = max(causes, key=lambda c: (causes[c], -self._cause_rank[c])) if causes else None
+        return Classification(
+            score=sum(incident_hits.values()),
+            root_cause_category=cause,
+            severity=severity,
+            affected_services=list(services),
+        )
+
+
+@lru_cache(maxsize=1)
+def default_classifier() -> Classifier:
+    return Classifier()
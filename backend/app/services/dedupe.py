@@ -0,0 +1,300 @@
+"""
+Near-duplicate detection at ingest.
+
+The same outage often arrives more than once under different ids: from a
+company's status page, from its engineering blog's feed, and again when a
+Statuspage incident is re-created. Every new row gets a MinHash signature
+of its title (word unigrams and bigrams, minus stopwords, status-page
+boilerplate and the company's own name), split into LSH bands. Band keys
+carry the company and are filed in postmortem_bands (migration 009), so
+finding candidates is one indexed lookup on the new rows' keys, however
+many rows are stored. A candidate whose estimated Jaccard similarity
+reaches `threshold` and whose published_at lies within `window_days`
+makes the new row a duplicate of it, or of the incident it duplicates.
+
+What happens to a duplicate depends on the action. "flag" (the default)
+only sets duplicate_of and leaves the status its handler chose, since a
+title match can still be a distinct recurring incident. "hold" also holds
+it as pending for review. "merge" folds its tags and affected services
+into the original and stores it as rejected, so later syncs still know
+its id.
+
+Titles with fewer than `min_tokens` informative words ("Service
+Disruption") say too little to compare and are never fingerprinted.
+
+Takes a PostmortemRepository and is kept free of app settings so the
+standalone scripts can use it; they build theirs with `from_env()` from the
+DEDUPE_* variables. `python -m app.services.dedupe --backfill` fingerprints
+rows stored before this existed.
+"""
+
+import hashlib
+import os
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.db.repository import PostmortemRepository
+
+ACTIONS = ("flag", "hold", "merge")
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS   # LSH catches pairs from roughly 50% Jaccard up
+
+_PRIME = 4294967291   # largest prime below 2**32; crc32 hashes are below it too
+_rng = np.random.default_rng(0x5EED)
+# a * x + b stays below 2**64 for 32-bit x
+_A = _rng.integers(1, 2**31, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**31, NUM_PERM, dtype=np.uint64)
+
+_STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in into is it of on or our some the this to was
+    we were with due after during all any
+    incident incidents postmortem post mortem resolved investigating identified monitoring
+    update updated issue issues affecting impacting
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(title: str, company: str) -> list[str]:
+    own = set(_WORD.findall(company.lower()))
+    words = []
+    for word in _WORD.findall(title.lower()):
+        if word in _STOPWORDS or word in own:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def signature(title: str, company: str, min_tokens: int = 3) -> np.ndarray | None:
+    """MinHash signature of a title, or None when it's too short to compare."""
+    words = _tokens(title, company)
+    if len(set(words)) < min_tokens:
+        return None
+    shingles = set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+    x = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((np.outer(x, _A) + _B) % _PRIME).min(axis=0).astype("<u4")
+
+
+def band_keys(company: str, sig: np.ndarray) -> list[str]:
+    company = company.lower()
+    return [
+        f"{company}:{b}:"
+        + hashlib.blake2b(sig[b * ROWS_PER_BAND:(b + 1) * ROWS_PER_BAND].tobytes(), digest_size=8).hexdigest()
+        for b in range(BANDS)
+    ]
+
+
+def encode(sig: np.ndarray) -> str:
+    return sig.tobytes().hex()
+
+
+def decode(fingerprint: str) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(fingerprint), dtype="<u4")
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def _when(value) -> datetime | None:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class DedupePlan:
+    """What `Deduper.mark` decided for one batch, applied by `Deduper.commit`
+    once the rows are stored."""
+    bands: list[tuple[str, str]] = field(default_factory=list)        # (band key, postmortem id)
+    merges: dict[str, list[dict]] = field(default_factory=dict)       # original id → its duplicates
+    flagged: int = 0
+    merged: int = 0
+
+
+class Deduper:
+    def __init__(
+        self,
+        *,
+        action: str = "flag",
+        threshold: float = 0.6,
+        window_days: float = 7.0,
+        min_tokens: int = 3,
+    ):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown dedupe action {action!r}; expected one of {', '.join(ACTIONS)}")
+        self.action = action
+        self.threshold = threshold
+        self.window_seconds = window_days * 86400
+        self.min_tokens = min_tokens
+
+    def _in_window(self, a, b) -> bool:
+        # Undated rows can't be ruled out by date
+        a, b = _when(a), _when(b)
+        return a is None or b is None or abs((a - b).total_seconds()) <= self.window_seconds
+
+    async def mark(self, repo: PostmortemRepository, rows: list[dict]) -> DedupePlan:
+        """Fingerprint new rows and mark the duplicates among them, in place.
+
+        Every row gets "fingerprint" and "duplicate_of" keys (None when not
+        applicable), so a batch keeps one column set. Rows earlier in the
+        batch count as candidates for later ones.
+        """
+        plan = DedupePlan()
+        signed: dict[str, tuple[np.ndarray, list[str]]] = {}
+        for row in rows:
+            row.setdefault("duplicate_of", None)
+            sig = signature(row.get("title") or "", row.get("company") or "", self.min_tokens)
+            row["fingerprint"] = None if sig is None else encode(sig)
+            if sig is not None:
+                signed[row["id"]] = (sig, band_keys(row["company"], sig))
+        if not signed:
+            return plan
+
+        buckets: dict[str, list[tuple[dict, np.ndarray]]] = defaultdict(list)
+        wanted = list({key for _, keys in signed.values() for key in keys})
+        for candidate in await repo.fingerprint_candidates(wanted):
+            sig = decode(candidate["fingerprint"])
+            for key in band_keys(candidate["company"], sig):
+                buckets[key].append((candidate, sig))
+
+        for row in rows:
+            if row["id"] not in signed:
+                continue
+            sig, keys = signed[row["id"]]
+            best, best_score = None, self.threshold
+            seen = set()
+            for key in keys:
+                for candidate, candidate_sig in buckets.get(key, ()):
+                    if candidate["id"] in seen or candidate["id"] == row["id"]:
+                        continue
+                    seen.add(candidate["id"])
+                    if not self._in_window(row.get("published_at"), candidate.get("published_at")):
+                        continue
+                    score = similarity(sig, candidate_sig)
+                    if score >= best_score:
+                        best, best_score = candidate, score
+
+            if best is not None:
+                original = best.get("duplicate_of") or best["id"]
+                row["duplicate_of"] = original
+                if self.action == "merge":
+                    row["status"] = "rejected"
+                    plan.merges.setdefault(original, []).append(row)
+                    plan.merged += 1
+                else:
+                    plan.flagged += 1
+                    if self.action == "hold":
+                        row["status"] = "pending"
+
+            entry = {key: row.get(key) for key in ("id", "company", "published_at", "duplicate_of")}
+            for key in keys:
+                buckets[key].append((entry, sig))
+                plan.bands.append((key, row["id"]))
+        return plan
+
+    async def commit(self, repo: PostmortemRepository, plan: DedupePlan) -> None:
+        """File the new rows' band keys and fold merged duplicates into their originals."""
+        if plan.bands:
+            await repo.add_fingerprint_bands(plan.bands)
+        if not plan.merges:
+            return
+        originals = await repo.get_many(
+            list(plan.merges), fields=("id", "tags", "affected_services", "severity", "root_cause_category"),
+        )
+        for original in originals:
+            values: dict = {}
+            for column in ("tags", "affected_services"):
+                merged = list(dict.fromkeys(
+                    [*(original.get(column) or []), *(v for dup in plan.merges[original["id"]] for v in dup.get(column) or [])]
+                ))
+                if merged != (original.get(column) or []):
+                    values[column] = merged
+            for column in ("severity", "root_cause_category"):
+                if not original.get(column):
+                    filled = next((dup[column] for dup in plan.merges[original["id"]] if dup.get(column)), None)
+                    if filled:
+                        values[column] = filled
+            if values:
+                await repo.update(original["id"], values)
+
+
+def from_env() -> Deduper | None:
+    """The Deduper configured by DEDUPE_ENABLED / _ACTION / _THRESHOLD /
+    _WINDOW_DAYS (the app's settings use the same names), or None when disabled."""
+    if os.environ.get("DEDUPE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    return Deduper(
+        action=os.environ.get("DEDUPE_ACTION", "flag"),
+        threshold=float(os.environ.get("DEDUPE_THRESHOLD", 0.6)),
+        window_days=float(os.environ.get("DEDUPE_WINDOW_DAYS", 7)),
+    )
+
+
+async def backfill(repo: PostmortemRepository, batch_size: int = 500) -> int:
+    """Fingerprint stored pending and published rows that have none; returns how many were."""
+    deduper = Deduper()
+    done = 0
+    for status in ("published", "pending"):
+        after = None
+        while True:
+            rows, _ = await repo.list_by_status(
+                status, limit=batch_size, after=after, count="none",
+                fields=("id", "company", "title", "created_at", "fingerprint"),
+            )
+            bands = []
+            for row in rows:
+                if row.get("fingerprint"):
+                    continue
+                sig = signature(row["title"] or "", row["company"] or "", deduper.min_tokens)
+                if sig is None:
+                    continue
+                await repo.update(row["id"], {"fingerprint": encode(sig)})
+                bands += [(key, row["id"]) for key in band_keys(row["company"], sig)]
+                done += 1
+            await repo.add_fingerprint_bands(bands)
+            if len(rows) < batch_size:
+                break
+            after = (rows[-1]["created_at"], rows[-1]["id"])
+    return done
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from dotenv import load_dotenv
+
+    from app.db.storage import storage_from_env
+
+    parser = argparse.ArgumentParser(description="Near-duplicate fingerprints")
+    parser.add_argument("--backfill", action="store_true", help="fingerprint rows stored without one")
+    args = parser.parse_args()
+
+    async def _main() -> None:
+        storage = await storage_from_env()
+        try:
+            if args.backfill:
+                print(f"Fingerprinted {await backfill(storage.postmortems):,} rows")
+        finally:
+            await storage.close()
+
+    load_dotenv()
+    asyncio.run(_main())
@@ -0,0 +1,169 @@
+"""
+Bulk export of published postmortems as NDJSON, CSV or Parquet.
+
+Rows are read in keyset batches ordered by (created_at, id), so each batch
+is one indexed range read whatever the depth and rows added mid-export
+land after the cursor. Every batch is encoded and yielded as one chunk, so
+memory stays at one batch however large the corpus. Used by
+GET /postmortems/export and scripts/export_postmortems.py.
+
+Parquet needs the optional `pyarrow` package; each batch becomes one row
+group of the same file.
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+import orjson
+
+from app.db.repository import PostmortemRepository
+
+DEFAULT_BATCH_SIZE = 500
+
+COLUMNS = (
+    "id", "company", "title", "url", "source_url", "published_at", "severity",
+    "affected_services", "root_cause_category", "tags", "ai_summary", "created_at",
+)
+_LIST_COLUMNS = {"affected_services", "tags"}
+
+FORMATS = {
+    "ndjson":  "application/x-ndjson",
+    "csv":     "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+async def iter_batches(
+    repo: PostmortemRepository,
+    *,
+    company: str | None = None,
+    severity: str | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> AsyncIterator[list[dict]]:
+    after = None
+    while True:
+        rows, _ = await repo.list_published(
+            company=company, severity=severity, sort_by="created_at", desc=False,
+            limit=batch_size, after=after, count="none", fields=COLUMNS,
+        )
+        if not rows:
+            return
+        yield [{col: row.get(col) for col in COLUMNS} for row in rows]
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+
+
+def _ndjson(batch: list[dict]) -> bytes:
+    return b"".join(orjson.dumps(row, default=str) + b"\n" for row in batch)
+
+
+def _csv_chunks(batches: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    async def gen():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(COLUMNS)
+        async for batch in batches:
+            for row in batch:
+                writer.writerow(
+                    json.dumps(row[col] or []) if col in _LIST_COLUMNS else row[col]
+                    for col in COLUMNS
+                )
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode()
+    return gen()
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out, self._parts = b"".join(self._parts), []
+        return out
+
+
+def _parquet_chunks(batches: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    pa, pq = _pyarrow()
+    text = pa.string()
+    schema = pa.schema([
+        (col, pa.list_(text) if col in _LIST_COLUMNS else text) for col in COLUMNS
+    ])
+
+    async def gen():
+        sink = _Sink()
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        try:
+            async for batch in batches:
+                columns = {
+                    col: [
+                        (row[col] or []) if col in _LIST_COLUMNS else (None if row[col] is None else str(row[col]))
+                        for row in batch
+                    ]
+                    for col in COLUMNS
+                }
+                writer.write_table(pa.table(columns, schema=schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+    return gen()
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires the `pyarrow` package")
+    return pa, pq
+
+
+def stream(
+    repo: PostmortemRepository,
+    fmt: str,
+    *,
+    company: str | None = None,
+    severity: str | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Encoded chunks of the export, one per batch.
+
+    Raises ExportError up front for an unknown format or missing pyarrow,
+    before anything is read.
+    """
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    batches = iter_batches(repo, company=company, severity=severity, batch_size=batch_size)
+    if fmt == "csv":
+        return _csv_chunks(batches)
+    if fmt == "parquet":
+        return _parquet_chunks(batches)
+
+    async def gen():
+        async for batch in batches:
+            yield _ndjson(batch)
+    return gen()
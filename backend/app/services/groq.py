@@ -1,11 +1,28 @@
+import asyncio
 import httpx
+import json
 import logging
+import random
+import time
+from typing import AsyncGenerator
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 from app.core.config import settings
+from app.services import llm_cache, metrics
 
 logger = logging.getLogger(__name__)
 
 _API_URL = "https://api.groq.com/openai/v1/chat/completions"
 _MODEL = "llama-3.3-70b-versatile"
+MAX_TOKENS = 300
+# Part of the response cache key (app.services.llm_cache): bump when
+# PROMPT_TEMPLATE changes so cached summaries of the old prompt aren't reused
+PROMPT_VERSION = 1
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# App-lifetime pooled client, opened/closed from the FastAPI lifespan in app.main
+_client: httpx.AsyncClient | None = None
 
 PROMPT_TEMPLATE = """You are a site reliability engineering analyst reviewing public software incidents.
 
@@ -20,12 +37,124 @@ Root Cause Category: {root_cause_category}
 Tags: {tags}"""
 
 
-async def generate_summary(post: dict) -> str:
-    if not settings.groq_api_key:
-        raise ValueError("GROQ_API_KEY is not set in environment")
+async def open_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(settings.groq_timeout, connect=settings.groq_connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.groq_max_connections,
+                max_keepalive_connections=settings.groq_max_keepalive,
+                keepalive_expiry=settings.groq_keepalive_expiry,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _retry_after(resp: httpx.Response) -> float | None:
+    value = resp.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int, resp: httpx.Response | None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(settings.groq_backoff_max, settings.groq_backoff_base * 2 ** attempt))
+    retry_after = _retry_after(resp) if resp is not None else None
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, settings.groq_backoff_max))
+    return delay
+
+
+def _headers() -> dict:
+    return {
+        "Authorization": f"Bearer {settings.groq_api_key}",
+        "Content-Type": "application/json",
+    }
+
+
+def _record(kind: str, status: int | str, started: float) -> None:
+    metrics.groq_requests.inc(kind=kind, status=status)
+    metrics.groq_request_seconds.observe(time.perf_counter() - started, kind=kind)
+    if status == 429:
+        metrics.groq_rate_limited.inc()
+
+
+def _record_usage(usage: dict | None) -> None:
+    if not usage:
+        return
+    metrics.groq_tokens.inc(usage.get("prompt_tokens") or 0, type="prompt")
+    metrics.groq_tokens.inc(usage.get("completion_tokens") or 0, type="completion")
+
+
+def _error(resp: httpx.Response) -> ValueError:
+    logger.error("Groq API error %s: %s", resp.status_code, resp.text)
+    if resp.status_code == 429:
+        return ValueError("AI quota exceeded — try again later")
+    return ValueError(f"Groq API returned {resp.status_code}")
+
+
+async def _post(payload: dict) -> httpx.Response:
+    """POST to Groq, retrying 429/5xx and transport errors with backoff."""
+    client = await open_client()
+    headers = _headers()
+
+    attempt = 0
+    while True:
+        resp = None
+        started = time.perf_counter()
+        try:
+            resp = await client.post(_API_URL, headers=headers, json=payload)
+            _record("generate", resp.status_code, started)
+            if resp.status_code not in _RETRY_STATUSES:
+                return resp
+        except httpx.TransportError as e:
+            _record("generate", "transport_error", started)
+            if attempt >= settings.groq_max_retries:
+                raise
+            logger.warning("Groq request failed (%s), retrying", e)
+
+        if attempt >= settings.groq_max_retries:
+            return resp
+
+        delay = _backoff(attempt, resp)
+        if resp is not None:
+            logger.warning("Groq API returned %s, retrying in %.1fs", resp.status_code, delay)
+        await asyncio.sleep(delay)
+        attempt += 1
+
 
+def _payload(post: dict, stream: bool = False) -> dict:
+    payload = {
+        "model": _MODEL,
+        "messages": [{"role": "user", "content": build_prompt(post)}],
+        "max_tokens": MAX_TOKENS,
+        "temperature": 0.4,
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def build_prompt(post: dict) -> str:
     affected = post.get("affected_services") or []
-    prompt = PROMPT_TEMPLATE.format(
+    return PROMPT_TEMPLATE.format(
         title=post.get("title", "Unknown incident"),
         company=post.get("company", "Unknown"),
         severity=post.get("severity", "unknown"),
@@ -35,30 +164,108 @@ async def generate_summary(post: dict) -> str:
         tags=", ".join(post.get("tags") or []),
     )
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.post(
-            _API_URL,
-            headers={
-                "Authorization": f"Bearer {settings.groq_api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": _MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 300,
-                "temperature": 0.4,
-            },
-        )
-        if not resp.is_success:
-            logger.error("Groq API error %s: %s", resp.status_code, resp.text)
-            if resp.status_code == 429:
-                raise ValueError("AI quota exceeded — try again later")
-            raise ValueError(f"Groq API returned {resp.status_code}")
-        data = resp.json()
+
+def estimate_tokens(post: dict) -> int:
+    """Rough prompt + completion token count, for rate budgeting (~4 chars/token)."""
+    return len(build_prompt(post)) // 4 + MAX_TOKENS
+
+
+async def cached_summary(post: dict) -> str | None:
+    """The summary a previous identical prompt got, if the response cache has it."""
+    cache = llm_cache.get_cache()
+    if cache is None:
+        return None
+    return await cache.get(llm_cache.key(_payload(post), PROMPT_VERSION))
+
+
+async def _store(payload: dict, summary: str) -> None:
+    cache = llm_cache.get_cache()
+    if cache is not None and summary:
+        await cache.put(llm_cache.key(payload, PROMPT_VERSION), payload["model"], summary)
+
+
+async def generate_summary(post: dict, *, check_cache: bool = True) -> str:
+    """Summary from the response cache, else from Groq (and then cached).
+
+    check_cache=False skips the lookup for callers that just made it; the
+    result is still stored.
+    """
+    if check_cache:
+        summary = await cached_summary(post)
+        if summary is not None:
+            return summary
+
+    if not settings.groq_api_key:
+        raise ValueError("GROQ_API_KEY is not set in environment")
+
+    payload = _payload(post)
+    resp = await _post(payload)
+    if not resp.is_success:
+        raise _error(resp)
+    data = resp.json()
+    _record_usage(data.get("usage"))
 
     choices = data.get("choices", [])
     if not choices:
         logger.error("Groq returned no choices. Response: %s", data)
         raise ValueError("Groq returned no choices")
 
-    return choices[0]["message"]["content"].strip()
+    summary = choices[0]["message"]["content"].strip()
+    await _store(payload, summary)
+    return summary
+
+
+async def stream_summary(post: dict) -> AsyncGenerator[str, None]:
+    """Yield summary text deltas as Groq produces them (`stream: true`).
+
+    429/5xx are retried with the same backoff as generate_summary, but only
+    before the first delta has been sent. A cached summary is yielded whole;
+    a completed stream is cached.
+    """
+    summary = await cached_summary(post)
+    if summary is not None:
+        yield summary
+        return
+
+    if not settings.groq_api_key:
+        raise ValueError("GROQ_API_KEY is not set in environment")
+
+    client = await open_client()
+    payload = _payload(post, stream=True)
+    parts: list[str] = []
+
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        async with client.stream("POST", _API_URL, headers=_headers(), json=payload) as resp:
+            if resp.status_code in _RETRY_STATUSES and attempt < settings.groq_max_retries:
+                _record("stream", resp.status_code, started)
+                delay = _backoff(attempt, resp)
+                logger.warning("Groq API returned %s, retrying in %.1fs", resp.status_code, delay)
+            elif not resp.is_success:
+                _record("stream", resp.status_code, started)
+                await resp.aread()
+                raise _error(resp)
+            else:
+                try:
+                    async for line in resp.aiter_lines():
+                        if not line.startswith("data: "):
+                            continue
+                        data = line[len("data: "):]
+                        if data == "[DONE]":
+                            break
+                        chunk = json.loads(data)
+                        # Usage arrives on the last chunk, under x_groq or (OpenAI style) at the top level
+                        _record_usage((chunk.get("x_groq") or {}).get("usage") or chunk.get("usage"))
+                        choices = chunk.get("choices") or []
+                        delta = choices[0].get("delta", {}).get("content") if choices else None
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+                finally:
+                    _record("stream", resp.status_code, started)
+                await _store(payload, "".join(parts).strip())
+                return
+
+        await asyncio.sleep(delay)
+        attempt += 1
@@ -0,0 +1,30 @@
+"""
+Registry of source handlers, keyed by `sources.method`.
+
+Importing this package registers the built-in handlers. A new method is a
+module with a SourceHandler subclass decorated with @register, imported
+below.
+"""
+
+from app.services.handlers.base import (
+    FetchContext,
+    NotModified,
+    Page,
+    SourceError,
+    SourceHandler,
+    get_handler,
+    methods,
+    register,
+)
+from app.services.handlers import github_json, rss, statuspage  # noqa: F401  (registers handlers)
+
+__all__ = [
+    "FetchContext",
+    "NotModified",
+    "Page",
+    "SourceError",
+    "SourceHandler",
+    "get_handler",
+    "methods",
+    "register",
+]
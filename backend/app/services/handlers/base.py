@@ -0,0 +1,75 @@
+"""
+Source handler interface.
+
+A handler knows how to fetch one kind of source (`sources.method`) and turn
+what it finds into postmortem rows. It only fetches and normalises: the
+SyncEngine owns the shared HTTP client, per-host rate limits, batched
+writes, validators, progress events and metrics, so every method gets
+them for free.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
+
+
+class SourceError(Exception):
+    """The source is misconfigured or returned something unusable; ends the sync."""
+
+
+class NotModified(Exception):
+    """The source answered a conditional request with 304; nothing to write."""
+
+
+@dataclass
+class Page:
+    number: int
+    rows: list[dict]
+    seen: int          # raw entries read, including ones normalised away
+
+
+@dataclass
+class FetchContext:
+    get: Callable[..., Awaitable[httpx.Response]]   # pooled, rate-limited GET
+    validators: dict                                 # cached for feed_url (may be empty)
+    fresh: dict = field(default_factory=dict)        # validators to save after a full sync
+    last_synced: str | None = None
+
+
+class SourceHandler(ABC):
+    method: str = ""
+
+    @abstractmethod
+    def feed_url(self, source: dict) -> str:
+        """The URL validators are stored under; raise SourceError if config is missing."""
+
+    @abstractmethod
+    def pages(self, source: dict, ctx: FetchContext) -> AsyncIterator[Page]:
+        """Yield normalised rows page by page, newest first where the source allows.
+
+        Send the cached validators on the first request, put the response's
+        validators in `ctx.fresh`, and raise NotModified on a 304. Stop once
+        entries are older than `ctx.last_synced` when the source is ordered.
+        """
+
+
+_registry: dict[str, SourceHandler] = {}
+
+
+def register(handler_cls: type[SourceHandler]) -> type[SourceHandler]:
+    """Class decorator adding a handler to the registry under its `method`."""
+    _registry[handler_cls.method] = handler_cls()
+    return handler_cls
+
+
+def get_handler(method: str) -> SourceHandler:
+    try:
+        return _registry[method]
+    except KeyError:
+        raise SourceError(f"No handler for source method {method!r}")
+
+
+def methods() -> list[str]:
+    return sorted(_registry)
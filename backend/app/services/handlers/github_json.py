@@ -0,0 +1,81 @@
+"""
+github_json: a JSON file of postmortems kept in a GitHub repository.
+
+config: {
+    "repo":   "owner/name",
+    "file":   "postmortems.json",
+    "branch": "main",        # optional
+    "status": "pending",     # optional; status for new rows
+}
+
+The file is either a list of entries or {"postmortems": [...]}. Each entry
+needs a `url` and `title`; `id`, `published_at`, `severity`, `tags`,
+`affected_services` and `root_cause_category` are used when present, and
+guessed by the keyword classifier from the title and `summary` otherwise.
+"""
+
+import hashlib
+from typing import AsyncIterator
+
+from app.services.classifier import default_classifier
+from app.services.handlers.base import FetchContext, NotModified, Page, SourceError, SourceHandler, register
+from app.services.http_cache import conditional_headers, validators_from_headers
+
+
+def normalise_entry(entry: dict, source: dict, feed_url: str, status: str) -> dict | None:
+    url = entry.get("url")
+    title = entry.get("title")
+    if not url or not title:
+        return None
+    entry_id = entry.get("id") or hashlib.sha256(url.encode()).hexdigest()[:16]
+    tags = entry.get("tags") or []
+    guess = default_classifier().classify(title, entry.get("summary") or "", tags)
+    return {
+        "id":                  f"{source['slug']}-{entry_id}",
+        "company":             entry.get("company") or source["company"],
+        "title":               title,
+        "url":                 url,
+        "source_url":          feed_url,
+        "published_at":        entry.get("published_at"),
+        "severity":            entry.get("severity") or guess.severity,
+        "affected_services":   entry.get("affected_services") or guess.affected_services,
+        "root_cause_category": entry.get("root_cause_category") or guess.root_cause_category,
+        "tags":                tags,
+        "status":              status,
+    }
+
+
+@register
+class GitHubJSONHandler(SourceHandler):
+    method = "github_json"
+
+    def feed_url(self, source: dict) -> str:
+        config = source.get("config") or {}
+        repo, file = config.get("repo", "").strip("/"), config.get("file", "").strip("/")
+        if not repo or not file:
+            raise SourceError("github_json source requires config.repo and config.file")
+        return f"https://raw.githubusercontent.com/{repo}/{config.get('branch', 'main')}/{file}"
+
+    async def pages(self, source: dict, ctx: FetchContext) -> AsyncIterator[Page]:
+        feed_url = self.feed_url(source)
+        r = await ctx.get(feed_url, headers=conditional_headers(ctx.validators))
+        if r.status_code == 304:
+            raise NotModified
+        if r.status_code != 200:
+            raise SourceError(f"GitHub returned {r.status_code} for {feed_url}")
+        ctx.fresh.update(validators_from_headers(r.headers))
+
+        try:
+            data = r.json()
+        except Exception:
+            raise SourceError(f"{feed_url} is not valid JSON")
+        entries = data.get("postmortems", []) if isinstance(data, dict) else data
+        if not isinstance(entries, list):
+            raise SourceError(f"{feed_url} must hold a list of postmortems")
+
+        status = (source.get("config") or {}).get("status", "pending")
+        rows = [
+            row for entry in entries
+            if isinstance(entry, dict) and (row := normalise_entry(entry, source, feed_url, status))
+        ]
+        yield Page(1, rows, len(entries))
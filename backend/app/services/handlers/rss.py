@@ -0,0 +1,141 @@
+"""
+rss: an RSS / Atom feed, e.g. an engineering blog.
+
+config: {
+    "feed_url":   "https://www.etsy.com/codeascraft/feed",
+    "min_score":  1,           # optional; incident score needed to keep an entry
+    "keywords":   [...],       # optional; replaces the incident keyword table ([] keeps all)
+    "classifier": {...},       # optional; table overrides, see app.services.classifier
+    "status":     "pending",   # optional; status for new rows
+}
+
+Blog content is usually under copyright, so only metadata and the link are
+stored, as pending rows for an admin to review. Entries are scored by the
+keyword classifier, which also fills severity, root cause category and
+affected services. IDs are derived from the entry URL, so re-runs never
+create duplicates.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import feedparser
+
+from app.services.classifier import Classifier, default_classifier
+from app.services.handlers.base import FetchContext, NotModified, Page, SourceError, SourceHandler, register
+from app.services.http_cache import conditional_headers, validators_from_headers
+
+DEFAULT_MIN_SCORE = 1.0
+
+# feedparser is pure Python and CPU-bound. Parsing runs on its own small
+# pool so a burst of feeds can't take every default-executor thread from
+# storage calls (the SQLite backend runs there).
+_PARSE_WORKERS = int(os.environ.get("FEED_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+_parse_pool: ThreadPoolExecutor | None = None
+
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def source_classifier(config: dict) -> tuple[Classifier, float]:
+    """The classifier and minimum incident score configured for a source."""
+    overrides = dict(config.get("classifier") or {})
+    min_score = float(config.get("min_score", DEFAULT_MIN_SCORE))
+    if "keywords" in config:
+        overrides["incident"] = list(config["keywords"])
+        if not config["keywords"]:
+            min_score = 0.0
+    try:
+        return default_classifier().with_overrides(overrides), min_score
+    except ValueError as e:
+        raise SourceError(str(e))
+
+
+async def parse_feed(content: bytes):
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ThreadPoolExecutor(max_workers=_PARSE_WORKERS, thread_name_prefix="feedparse")
+    return await asyncio.get_running_loop().run_in_executor(_parse_pool, feedparser.parse, content)
+
+
+def make_id(url: str) -> str:
+    """Stable ID from URL so re-runs don't create duplicates."""
+    return hashlib.sha256(url.encode()).hexdigest()[:16]
+
+
+def parse_date(entry: dict) -> str | None:
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if parsed:
+        return datetime(*parsed[:6], tzinfo=timezone.utc).isoformat()
+    return None
+
+
+def normalise_entry(
+    entry: dict,
+    company: str,
+    feed_url: str,
+    status: str,
+    classifier: Classifier,
+    min_score: float = DEFAULT_MIN_SCORE,
+) -> dict | None:
+    """Map a feed entry to a postmortem row, or None if it doesn't look like an incident."""
+    tags = [t.get("term", "") for t in entry.get("tags", []) if t.get("term")]
+    found = classifier.classify(
+        entry.get("title", ""),
+        _HTML_TAG.sub(" ", entry.get("summary", "")),
+        tags,
+    )
+    if found.score < min_score:
+        return None
+    return {
+        "id":                  make_id(entry.get("link", entry.get("id", ""))),
+        "company":             company,
+        "title":               entry.get("title", "Untitled"),
+        "url":                 entry.get("link", ""),
+        "source_url":          feed_url,
+        "published_at":        parse_date(entry),
+        "tags":                tags,
+        "ai_summary":          None,
+        "root_cause_category": found.root_cause_category,
+        "severity":            found.severity,
+        "affected_services":   found.affected_services,
+        "status":              status,
+    }
+
+
+@register
+class RSSHandler(SourceHandler):
+    method = "rss"
+
+    def feed_url(self, source: dict) -> str:
+        url = (source.get("config") or {}).get("feed_url", "").strip()
+        if not url:
+            raise SourceError("rss source requires config.feed_url")
+        return url
+
+    async def pages(self, source: dict, ctx: FetchContext) -> AsyncIterator[Page]:
+        config = source.get("config") or {}
+        feed_url = self.feed_url(source)
+        classifier, min_score = source_classifier(config)
+
+        r = await ctx.get(feed_url, headers=conditional_headers(ctx.validators))
+        if r.status_code == 304:
+            raise NotModified
+        if r.status_code != 200:
+            raise SourceError(f"Feed returned {r.status_code}: {r.text[:300]}")
+        ctx.fresh.update(validators_from_headers(r.headers))
+
+        feed = await parse_feed(r.content)
+        if feed.bozo and not feed.entries:
+            raise SourceError(f"Could not parse feed: {feed.bozo_exception}")
+
+        status = config.get("status", "pending")
+        rows = [
+            row for entry in feed.entries
+            if (row := normalise_entry(entry, source["company"], feed_url, status, classifier, min_score))
+        ]
+        yield Page(1, rows, len(feed.entries))
@@ -0,0 +1,108 @@
+"""
+statuspage_api: the public Statuspage v2 incidents API.
+
+config: {"statuspage_url": "https://www.githubstatus.com"}
+
+Pages through /api/v2/incidents.json (100 per page, newest first) and
+stops early once past last_synced_at. Incidents with impact none or
+maintenance are skipped.
+"""
+
+from typing import AsyncIterator
+
+from app.services.handlers.base import FetchContext, NotModified, Page, SourceError, SourceHandler, register
+from app.services.http_cache import conditional_headers, validators_from_headers
+
+PER_PAGE = 100
+
+# Statuspage indicator → severity
+_SEVERITY_MAP = {
+    "minor":    "medium",
+    "major":    "high",
+    "critical": "critical",
+}
+
+
+def normalise_statuspage_incident(incident: dict, slug: str, company: str, page_url: str) -> dict | None:
+    """Map a Statuspage incident to a postmortem row, or None if it should be skipped."""
+    impact = incident.get("impact", "none")
+    if impact in ("none", "maintenance"):
+        return None
+
+    incident_id = incident.get("id", "")
+    if not incident_id:
+        return None
+
+    return {
+        "id":           f"{slug}-{incident_id[:12]}",
+        "title":        incident.get("name") or f"{company}: Service Disruption",
+        "company":      company,
+        "url":          incident.get("shortlink") or f"{page_url}/incidents/{incident_id}",
+        "source_url":   page_url,
+        "published_at": incident.get("created_at", ""),
+        "severity":     _SEVERITY_MAP.get(impact, "medium"),
+        "tags":         ["statuspage", slug, impact],
+        "status":       "published",
+    }
+
+
+def _page_url(source: dict) -> str:
+    page_url = (source.get("config") or {}).get("statuspage_url", "").strip().rstrip("/")
+    if not page_url:
+        raise SourceError("statuspage_api source requires config.statuspage_url")
+    if not page_url.startswith("http"):
+        page_url = f"https://{page_url}"
+    return page_url
+
+
+@register
+class StatuspageHandler(SourceHandler):
+    method = "statuspage_api"
+
+    def feed_url(self, source: dict) -> str:
+        return f"{_page_url(source)}/api/v2/incidents.json"
+
+    async def pages(self, source: dict, ctx: FetchContext) -> AsyncIterator[Page]:
+        page_url = _page_url(source)
+        feed_url = self.feed_url(source)
+        page = 1
+        while True:
+            headers = {"Accept": "application/json"}
+            if page == 1:
+                headers.update(conditional_headers(ctx.validators))
+            r = await ctx.get(feed_url, params={"page": page, "per_page": PER_PAGE}, headers=headers)
+
+            if page == 1 and r.status_code == 304:
+                raise NotModified
+            if page == 1:
+                ctx.fresh.update(validators_from_headers(r.headers))
+
+            if r.status_code != 200:
+                raise SourceError(f"Statuspage API error {r.status_code} on page {page}: {r.text[:300]}")
+
+            try:
+                batch = r.json().get("incidents", [])
+            except Exception:
+                raise SourceError(f"Non-JSON response from {feed_url} — check the URL")
+            if not batch:
+                return
+
+            incidents = []
+            stop_early = False
+            for inc in batch:
+                created_at = inc.get("created_at", "")
+                if ctx.last_synced and created_at and created_at <= ctx.last_synced:
+                    stop_early = True
+                    break
+                incidents.append(inc)
+
+            if incidents:
+                rows = [
+                    row for inc in incidents
+                    if (row := normalise_statuspage_incident(inc, source["slug"], source["company"], page_url))
+                ]
+                yield Page(page, rows, len(incidents))
+            if stop_early or len(batch) < PER_PAGE:
+                return
+
+            page += 1
@@ -0,0 +1,31 @@
+"""
+HTTP validator cache for source polling.
+
+Stores the ETag / Last-Modified of the last successfully ingested response
+per URL (SourceRepository.get_validators / save_validators), so the next
+poll can send If-None-Match / If-Modified-Since and skip the whole sync on
+a 304.
+
+Validators must only be saved after everything in that response has been
+written; otherwise a 304 would hide rows that never made it in.
+"""
+
+
+def conditional_headers(validators: dict) -> dict:
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def validators_from_headers(headers) -> dict:
+    """Pick the validators out of a response's headers (empty if it sent none)."""
+    validators = {}
+    if headers.get("etag"):
+        validators["etag"] = headers["etag"]
+    if headers.get("last-modified"):
+        validators["last_modified"] = headers["last-modified"]
+    return validators
+
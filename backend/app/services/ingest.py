@@ -0,0 +1,57 @@
+"""
+Batched ingestion of postmortem rows.
+
+Existing IDs are looked up in bulk and new rows are written as chunked
+multi-row inserts that skip duplicates, so a sync costs a few round trips
+per chunk instead of two per incident. With a Deduper (app.services.dedupe)
+new rows are fingerprinted first and near-duplicates of stored incidents
+are flagged or merged on the way in.
+
+Takes a PostmortemRepository (app.db.repository) and is kept free of app
+settings so the standalone scripts can import it.
+"""
+
+from typing import Iterator
+
+from app.services.dedupe import Deduper
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _chunks(items: list, size: int) -> Iterator[list]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def existing_ids(repo, ids: list[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> set[str]:
+    """Return the subset of ids already stored in postmortems."""
+    found: set[str] = set()
+    for chunk in _chunks(ids, chunk_size):
+        found.update(await repo.existing_ids(chunk))
+    return found
+
+
+async def write_new_rows(
+    repo, rows: list[dict], chunk_size: int = DEFAULT_CHUNK_SIZE, deduper: Deduper | None = None,
+) -> list[dict]:
+    """Insert rows whose id is not stored yet; returns the rows that were new.
+
+    The insert ignores conflicts, so a row inserted concurrently by another
+    sync between the lookup and the write is skipped rather than failing.
+    """
+    unique: dict[str, dict] = {}
+    for row in rows:
+        unique.setdefault(row["id"], row)
+    if not unique:
+        return []
+
+    known = await existing_ids(repo, list(unique), chunk_size)
+    new_rows = [row for id_, row in unique.items() if id_ not in known]
+
+    plan = await deduper.mark(repo, new_rows) if deduper and new_rows else None
+    for chunk in _chunks(new_rows, chunk_size):
+        await repo.insert_new(chunk)
+    if plan:
+        await deduper.commit(repo, plan)
+
+    return new_rows
@@ -0,0 +1,184 @@
+"""
+Persistent, content-addressed cache of LLM responses.
+
+Summary prompts are built from metadata alone, so different incidents
+(every "{company}: Service Disruption" import) and regenerations after a
+reset often send a prompt that has been answered before. Responses are kept
+in a local SQLite file keyed by a sha256 of the prompt template version and
+the request (model, rendered prompt, sampling parameters), so a repeated
+prompt is answered from disk and never reaches the API. A new model or a
+bumped template version simply misses.
+
+Least recently used entries are evicted past `max_entries` or `max_bytes`.
+Hits, misses and evictions are counted per process (GET /admin/llm-cache)
+and exported as metrics. The file is shared safely by several app workers
+(WAL journal); each keeps its own counters.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+from app.services import metrics
+
+_SCHEMA = """
+create table if not exists llm_responses (
+  key        text primary key,
+  model      text not null,
+  response   text not null,
+  size       integer not null,
+  created_at real not null,
+  last_used  real not null,
+  hits       integer not null default 0
+);
+create index if not exists idx_llm_responses_last_used on llm_responses(last_used);
+
+-- Running totals kept by triggers, so checking the limits on every store
+-- doesn't scan the table and every worker sharing the file sees the same
+create table if not exists llm_totals (
+  id      integer primary key check (id = 0),
+  entries integer not null,
+  bytes   integer not null
+);
+insert or ignore into llm_totals (id, entries, bytes)
+  select 0, count(*), coalesce(sum(size), 0) from llm_responses;
+create trigger if not exists llm_responses_insert after insert on llm_responses begin
+  update llm_totals set entries = entries + 1, bytes = bytes + new.size;
+end;
+create trigger if not exists llm_responses_update after update of size on llm_responses begin
+  update llm_totals set bytes = bytes - old.size + new.size;
+end;
+create trigger if not exists llm_responses_delete after delete on llm_responses begin
+  update llm_totals set entries = entries - 1, bytes = bytes - old.size;
+end;
+"""
+
+# Rows deleted per eviction query
+_EVICT_BATCH = 100
+
+
+def key(payload: dict, version: int) -> str:
+    """Content address of a request: everything that shapes the response."""
+    request = {k: v for k, v in payload.items() if k != "stream"}
+    blob = json.dumps({"version": version, "request": request}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: str, *, max_entries: int = 20000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("pragma journal_mode = wal")
+            self._conn.execute("pragma synchronous = normal")
+            self._conn.executescript(f"begin immediate; {_SCHEMA} commit;")
+
+    def _run(self, fn):
+        with self._lock:
+            return fn(self._conn)
+
+    async def get(self, key: str) -> str | None:
+        def read(c):
+            row = c.execute("select response from llm_responses where key = ?", (key,)).fetchone()
+            if row:
+                c.execute(
+                    "update llm_responses set last_used = ?, hits = hits + 1 where key = ?", (time.time(), key),
+                )
+            return row[0] if row else None
+
+        response = await asyncio.to_thread(self._run, read)
+        if response is None:
+            self.misses += 1
+            metrics.llm_cache_requests.inc(result="miss")
+        else:
+            self.hits += 1
+            metrics.llm_cache_requests.inc(result="hit")
+        return response
+
+    async def put(self, key: str, model: str, response: str) -> None:
+        def write(c) -> int:
+            now = time.time()
+            c.execute(
+                "insert into llm_responses (key, model, response, size, created_at, last_used) "
+                "values (?, ?, ?, ?, ?, ?) on conflict(key) do update set "
+                "response = excluded.response, size = excluded.size, last_used = excluded.last_used",
+                (key, model, response, len(response.encode()), now, now),
+            )
+            return self._evict(c)
+
+        evicted = await asyncio.to_thread(self._run, write)
+        self.stores += 1
+        if evicted:
+            self.evictions += evicted
+            metrics.llm_cache_evictions.inc(evicted)
+
+    def _evict(self, c) -> int:
+        """Drop least recently used rows until both limits hold; returns how many."""
+        evicted = 0
+        while True:
+            entries, size = c.execute("select entries, bytes from llm_totals").fetchone()
+            if entries <= self.max_entries and size <= self.max_bytes:
+                return evicted
+            n = max(min(entries - self.max_entries, _EVICT_BATCH), 1)
+            evicted += c.execute(
+                "delete from llm_responses where key in "
+                "(select key from llm_responses order by last_used limit ?)", (n,),
+            ).rowcount
+
+    async def clear(self) -> int:
+        return await asyncio.to_thread(self._run, lambda c: c.execute("delete from llm_responses").rowcount)
+
+    async def stats(self) -> dict:
+        entries, size = await asyncio.to_thread(
+            self._run, lambda c: c.execute("select entries, bytes from llm_totals").fetchone(),
+        )
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: LLMCache | None = None
+
+
+def get_cache() -> LLMCache | None:
+    """The app-wide cache, opened on first use; None when disabled."""
+    global _cache
+    if not settings.llm_cache_enabled:
+        return None
+    if _cache is None:
+        _cache = LLMCache(
+            settings.llm_cache_path,
+            max_entries=settings.llm_cache_max_entries,
+            max_bytes=settings.llm_cache_max_bytes,
+        )
+    return _cache
+
+
+def close() -> None:
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
@@ -0,0 +1,204 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms with labels, kept in module-level registries and
+rendered by GET /metrics (app.main). Values are per process: with several
+uvicorn workers, scrape each one or aggregate in Prometheus.
+
+Kept free of app settings so the standalone scripts can import modules
+that record metrics.
+"""
+
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {value:g}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for key, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = f'le="{bound if bound == "+Inf" else f"{bound:g}"}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative:g}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {series[-1]:g}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative:g}")
+        return lines
+
+
+def render() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by route template.
+
+    Timed until the last body chunk is sent, so streamed (SSE) responses
+    count their full duration. Requests that match no route are labelled
+    "unmatched" to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
+
+# ── Shared metrics ────────────────────────────────────────────────────────
+
+http_request_seconds = Histogram(
+    "continuum_http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route", "status"),
+)
+
+db_operation_seconds = Histogram(
+    "continuum_db_operation_duration_seconds", "Storage call latency by table and operation",
+    ("backend", "table", "operation"),
+)
+db_operation_errors = Counter(
+    "continuum_db_operation_errors_total", "Storage calls that raised",
+    ("backend", "table", "operation"),
+)
+
+groq_requests = Counter(
+    "continuum_groq_requests_total", "Groq API requests by outcome (every attempt, retries included)",
+    ("kind", "status"),
+)
+groq_request_seconds = Histogram(
+    "continuum_groq_request_duration_seconds", "Groq API request latency (full stream for streaming calls)",
+    ("kind",), buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+)
+groq_tokens = Counter(
+    "continuum_groq_tokens_total", "Tokens reported by Groq usage",
+    ("type",),
+)
+groq_rate_limited = Counter(
+    "continuum_groq_rate_limited_total", "Groq responses with status 429",
+)
+
+llm_cache_requests = Counter(
+    "continuum_llm_cache_requests_total", "LLM response cache lookups", ("result",),
+)
+llm_cache_evictions = Counter("continuum_llm_cache_evictions_total", "LLM responses evicted from the cache")
+sync_pages = Counter("continuum_sync_pages_fetched_total", "Statuspage pages fetched", ("source",))
+sync_incidents_seen = Counter("continuum_sync_incidents_seen_total", "Incidents read from Statuspage", ("source",))
+sync_incidents_inserted = Counter("continuum_sync_incidents_inserted_total", "New postmortems written by sync", ("source",))
+sync_incidents_skipped = Counter(
+    "continuum_sync_incidents_skipped_total", "Incidents not written (already stored or filtered)", ("source",),
+)
+sync_incidents_duplicate = Counter(
+    "continuum_sync_incidents_duplicate_total", "New incidents flagged or merged as near-duplicates", ("source",),
+)
+sync_seconds = Histogram(
+    "continuum_sync_duration_seconds", "Wall time of one source sync",
+    ("source", "outcome"), buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
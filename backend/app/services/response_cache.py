@@ -0,0 +1,148 @@
+"""
+Response cache for the public read endpoints.
+
+Entries are keyed on the endpoint plus its normalised query parameters and
+a global data version. Any write to postmortems calls `invalidate()`, which
+bumps the version so every older entry is unreachable at once (no per-key
+bookkeeping). Responses carry an ETag derived from the body, and a matching
+If-None-Match is answered with 304.
+
+Backends (settings.cache_backend):
+    memory  in-process TTL + LRU (default). Per worker: `invalidate()` only
+            reaches the worker that made the write, and never the sync
+            scripts' writes, so entries live for settings.cache_memory_ttl
+            (short) to bound how stale other workers can be. Use redis
+            for multi-worker deployments that need invalidation to be
+            immediate everywhere.
+    redis   any Redis-compatible server at settings.cache_url, shared by
+            workers and scripts (needs the optional `redis` package)
+    none    no caching; ETag / 304 still apply
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+
+class MemoryBackend:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._version = 0
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, body = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    async def set(self, key: str, body: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def version(self) -> int:
+        return self._version
+
+    async def bump(self) -> None:
+        self._version += 1
+        self._entries.clear()
+
+
+class RedisBackend:
+    _VERSION_KEY = "continuum:cache:version"
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the `redis` package")
+        self._redis = redis.from_url(url)
+        self.ttl = ttl
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(f"continuum:cache:{key}")
+
+    async def set(self, key: str, body: bytes) -> None:
+        await self._redis.set(f"continuum:cache:{key}", body, ex=max(int(self.ttl), 1))
+
+    async def version(self) -> int:
+        return int(await self._redis.get(self._VERSION_KEY) or 0)
+
+    async def bump(self) -> None:
+        await self._redis.incr(self._VERSION_KEY)
+
+
+class NullBackend:
+    async def get(self, key: str) -> bytes | None:
+        return None
+
+    async def set(self, key: str, body: bytes) -> None:
+        pass
+
+    async def version(self) -> int:
+        return 0
+
+    async def bump(self) -> None:
+        pass
+
+
+def _make_backend():
+    if settings.cache_backend == "redis":
+        return RedisBackend(settings.cache_url, settings.cache_ttl)
+    if settings.cache_backend == "none":
+        return NullBackend()
+    return MemoryBackend(settings.cache_max_entries, min(settings.cache_ttl, settings.cache_memory_ttl))
+
+
+_backend = _make_backend()
+
+
+def make_key(name: str, params: dict) -> str:
+    normalised = json.dumps({k: v for k, v in sorted(params.items()) if v is not None}, separators=(",", ":"))
+    return f"{name}:{hashlib.sha1(normalised.encode()).hexdigest()}"
+
+
+def _etag(body: bytes) -> str:
+    return f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+async def invalidate() -> None:
+    """Call after any write that changes what the read endpoints return."""
+    await _backend.bump()
+
+
+async def respond(request: Request, key: str, loader: Callable[[], Awaitable[object]]) -> Response:
+    """Serve `key` from cache, or build it with `loader()` and cache the JSON body.
+
+    Exceptions from the loader (e.g. a 404 HTTPException) propagate and are
+    not cached.
+    """
+    full_key = f"{await _backend.version()}:{key}"
+    body = await _backend.get(full_key)
+    if body is None:
+        # orjson handles dicts, lists and datetimes natively; anything else
+        # (e.g. a pydantic model) goes through FastAPI's encoder
+        body = orjson.dumps(await loader(), default=jsonable_encoder)
+        await _backend.set(full_key, body)
+
+    etag = _etag(body)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.cache_max_age}"}
+    if etag in (t.strip() for t in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,198 @@
+"""
+Built-in sync scheduler.
+
+Every poll it asks storage for as many due sources as it has free sync
+slots, takes each one's lease (app.services.leases) and syncs it through
+the SyncEngine, so several app workers or daemons can run side by side and
+a source is only ever synced by one of them. The lease is only granted
+while the source is still due and is renewed for as long as the sync runs;
+a crashed worker's lease simply expires.
+
+Each source keeps its own interval: halved when a sync finds new incidents,
+stretched by half when it finds nothing and doubled after an error, within
+[min_interval, max_interval]. The next due time gets ±jitter so sources
+added together drift apart instead of polling in lockstep.
+
+Runs inside the app (SYNC_SCHEDULER_ENABLED=true, stats at
+GET /admin/sources/scheduler) or as a daemon:
+
+    cd backend && python -m app.services.scheduler
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.db.repository import Storage
+from app.db.storage import close_storage, get_storage
+from app.services import response_cache
+from app.services.dedupe import Deduper
+from app.services.leases import LeaseUnavailable, hold, make_owner
+from app.services.sync_engine import SourceResult, SyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SchedulerStats:
+    syncs: int = 0
+    created: int = 0
+    failed: int = 0
+    lease_conflicts: int = 0
+    running: int = 0
+    last_error: str | None = None
+    started_at: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> dict:
+        return {
+            "syncs": self.syncs,
+            "created": self.created,
+            "failed": self.failed,
+            "lease_conflicts": self.lease_conflicts,
+            "running": self.running,
+            "uptime_seconds": round(time.monotonic() - self.started_at),
+            "last_error": self.last_error,
+        }
+
+
+class SyncScheduler:
+    def __init__(
+        self,
+        storage: Storage,
+        engine: SyncEngine,
+        *,
+        min_interval: float = 300,
+        max_interval: float = 86400,
+        initial_interval: float = 3600,
+        jitter: float = 0.1,
+        poll_seconds: float = 30,
+        batch_size: int = 50,
+    ):
+        self.storage = storage
+        self.engine = engine
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.jitter = jitter
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.owner = make_owner("scheduler")
+        self.stats = SchedulerStats()
+        self._running: dict[str, asyncio.Task] = {}
+
+    def next_interval(self, source: dict, result: SourceResult) -> float:
+        interval = source.get("sync_interval_seconds") or self.initial_interval
+        if result.error:
+            interval *= 2
+        elif result.created:
+            interval /= 2
+        else:
+            interval *= 1.5
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    async def _sync(self, source: dict) -> None:
+        result = SourceResult(slug=source["slug"], company=source["company"], error="not run")
+        try:
+            async with hold(self.storage.sources, source["id"], self.owner, only_if_due=True) as lease:
+                try:
+                    [result] = await self.engine.run([source])
+                finally:
+                    interval = self.next_interval(source, result)
+                    lease.interval_seconds = round(interval)
+                    lease.next_sync_at = datetime.now(timezone.utc) + timedelta(
+                        seconds=interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+                    )
+        except LeaseUnavailable:
+            self.stats.lease_conflicts += 1
+            return
+
+        self.stats.syncs += 1
+        self.stats.created += result.created
+        if result.error:
+            self.stats.failed += 1
+            self.stats.last_error = f"{source['slug']}: {result.error}"
+            logger.warning("Scheduled sync of %s failed: %s", source["slug"], result.error)
+        else:
+            logger.info("Synced %s: %d new, next in %.0fs", source["slug"], result.created, interval)
+
+    async def tick(self) -> int:
+        """Start syncs for due sources not already running here, up to the free
+        engine slots, so no source waits for a slot while holding its lease;
+        returns how many."""
+        free = min(self.engine.concurrency - len(self._running), self.batch_size)
+        if free <= 0:
+            self.stats.running = len(self._running)
+            return 0
+        # Over-fetch by what's running here, since those rows may still be listed as due
+        due = await self.storage.sources.due(datetime.now(timezone.utc), free + len(self._running))
+        started = 0
+        for source in due:
+            if started >= free:
+                break
+            if source["id"] in self._running:
+                continue
+            task = asyncio.create_task(self._sync(source))
+            self._running[source["id"]] = task
+            task.add_done_callback(lambda _, id=source["id"]: self._running.pop(id, None))
+            started += 1
+        self.stats.running = len(self._running)
+        return started
+
+    async def run_forever(self) -> None:
+        async with self.engine:
+            try:
+                while True:
+                    try:
+                        await self.tick()
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        self.stats.last_error = str(e)
+                        logger.exception("Scheduler poll failed")
+                    await asyncio.sleep(self.poll_seconds)
+            finally:
+                for task in list(self._running.values()):
+                    task.cancel()
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+
+def from_settings(storage: Storage) -> SyncScheduler:
+    engine = SyncEngine(
+        storage,
+        concurrency=settings.sync_scheduler_concurrency,
+        host_rate=settings.sync_host_rate,
+        host_burst=settings.sync_host_burst,
+        chunk_size=settings.ingest_chunk_size,
+        on_change=response_cache.invalidate,
+        deduper=Deduper(
+            action=settings.dedupe_action,
+            threshold=settings.dedupe_threshold,
+            window_days=settings.dedupe_window_days,
+        ) if settings.dedupe_enabled else None,
+    )
+    return SyncScheduler(
+        storage,
+        engine,
+        min_interval=settings.sync_scheduler_min_interval,
+        max_interval=settings.sync_scheduler_max_interval,
+        initial_interval=settings.sync_scheduler_initial_interval,
+        jitter=settings.sync_scheduler_jitter,
+        poll_seconds=settings.sync_scheduler_poll_seconds,
+    )
+
+
+async def _main() -> None:
+    scheduler = from_settings(await get_storage())
+    try:
+        await scheduler.run_forever()
+    finally:
+        await close_storage()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
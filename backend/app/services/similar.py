@@ -0,0 +1,514 @@
+"""
+"Similar incidents": a local vector index over published postmortems.
+
+Each row becomes a 256-dim vector of hashed features: title and
+ai_summary words and word pairs, tags, affected services, root cause
+category and company, each field weighted, with a log term frequency
+times an IDF kept in a hashed document-frequency table. No embedding
+service is involved.
+
+The vectors are stored as float16 (512 bytes per row) in an append-only
+file that is memory-mapped, not loaded. A 256-bit SimHash code per row
+(the signs of 256 fixed random projections, 32 bytes) is kept in RAM. A
+query scans every code with XOR + popcount, then re-scores the closest
+thousand by exact cosine on their vectors. Codes are held one 64-bit
+word per array (column-major) so the scan is four flat passes; at 1M
+rows a query takes under 10 ms.
+
+The index lives in settings.similar_index_dir and is updated
+incrementally. Admin publish / reject / delete and bulk jobs pass the
+changed rows to `update` / `remove`. New summaries mark their row
+stale (`touch`). A periodic `refresh` picks up stale rows and published
+rows created after the index watermark, which covers rows inserted by
+the sync scripts. Replaced or removed rows are tombstoned until a rebuild,
+and their features are taken back out of the document frequencies (each
+row's df buckets are kept in terms.bin for that):
+
+    cd backend && python -m app.services.similar --rebuild
+
+Several processes (uvicorn workers, the CLI) share one index directory.
+Writes hold an exclusive flock on the sibling `<dir>.lock` and queries a
+shared one, and a process reloads its in-RAM state whenever meta.json has
+changed since it last read or wrote it. Rows are written at the offsets
+meta.json records rather than appended, so an interrupted write is simply
+overwritten by the next one. A rebuild is built in a separate directory
+and swapped in under the lock.
+"""
+
+import argparse
+import asyncio
+import fcntl
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.core.config import settings
+from app.db.repository import PostmortemRepository
+from app.db.storage import close_storage, get_storage
+from app.services import response_cache
+
+logger = logging.getLogger(__name__)
+
+DIM = 256
+BITS = 256
+_WORDS = BITS // 64
+_DF_BUCKETS = 1 << 18
+_RERANK = 1024         # candidates re-scored by exact cosine per query
+_BATCH = 1000          # rows per storage read when catching up
+_FORMAT = 1
+
+# Fixed seed: the projections are part of the on-disk format
+_PLANES = np.random.default_rng(20240601).standard_normal((BITS, DIM)).astype(np.float32)
+
+FIELDS = (
+    "id", "company", "title", "tags", "affected_services", "root_cause_category",
+    "ai_summary", "status", "created_at",
+)
+
+_WEIGHTS = {"title": 2.0, "summary": 1.0, "tag": 1.5, "service": 1.0, "cause": 2.0, "company": 0.5}
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be been by for from has had have in into is it its of on or our that the "
+    "their this to was we were which with".split()
+)
+
+
+def _features(row: dict) -> dict[str, float]:
+    feats: dict[str, float] = {}
+
+    def add(feature: str, weight: float) -> None:
+        feats[feature] = feats.get(feature, 0.0) + weight
+
+    for field, text in (("title", row.get("title")), ("summary", row.get("ai_summary"))):
+        words = [w for w in _TOKEN.findall((text or "").lower()) if w not in _STOPWORDS]
+        weight = _WEIGHTS[field]
+        for i, word in enumerate(words):
+            add(word, weight)
+            if i:
+                add(f"{words[i - 1]} {word}", weight)
+    for tag in row.get("tags") or []:
+        add(f"tag:{tag.lower()}", _WEIGHTS["tag"])
+    for service in row.get("affected_services") or []:
+        add(f"service:{service.lower()}", _WEIGHTS["service"])
+    if row.get("root_cause_category"):
+        add(f"cause:{row['root_cause_category'].lower()}", _WEIGHTS["cause"])
+    if row.get("company"):
+        add(f"company:{row['company'].lower()}", _WEIGHTS["company"])
+    return feats
+
+
+def _hashed(feats: dict[str, float]) -> list[tuple[int, int, float, float]]:
+    """(df bucket, dimension, sign, weight) per feature."""
+    out = []
+    for feature, weight in feats.items():
+        h = zlib.crc32(feature.encode())
+        out.append(((h >> 8) % _DF_BUCKETS, h % DIM, 1.0 if h >> 31 else -1.0, math.log1p(weight)))
+    return out
+
+
+def _pack(vectors: np.ndarray) -> np.ndarray:
+    bits = (vectors @ _PLANES.T) > 0
+    return np.packbits(bits, axis=1).view(np.uint64)
+
+
+class SimilarIndex:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._file_lock(fcntl.LOCK_SH):
+            self._load()
+
+    # ── Files ─────────────────────────────────────────────────────────────
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _file_lock(self, kind: int):
+        """Cross-process lock: LOCK_EX to write the index, LOCK_SH to read it."""
+        with open(lock_path(self.path), "a") as f:
+            fcntl.flock(f, kind)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _version(self) -> tuple | None:
+        try:
+            st = os.stat(self._file("meta.json"))
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self._file("meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return {}
+        if meta.get("format") != _FORMAT or meta.get("dim") != DIM or meta.get("bits") != BITS:
+            raise RuntimeError(f"{self.path} was built with different settings; rebuild it")
+        return meta
+
+    def _load(self) -> None:
+        """(Re)read the index as of its last saved meta; call with a file lock held."""
+        self._seen = self._version()
+        meta = self._read_meta()
+        n = meta.get("count", 0)
+        self.watermark: list | None = meta.get("watermark")
+        self.docs: int = meta.get("docs", 0)
+        # Rows before terms_from were indexed before df buckets were kept
+        # per row, so they can't be counted out (a rebuild sets it to 0)
+        self.terms_from: int = meta.get("terms_from", n)
+        self.terms: int = meta.get("terms", 0)
+
+        self.ids: list[str] = []
+        self.ids_bytes = 0
+        if n:
+            with open(self._file("ids.txt"), "rb") as f:
+                data = f.read(meta["ids_bytes"]) if "ids_bytes" in meta else f.read()
+            self.ids = data.decode("utf-8").split("\n")[:n]
+            self.ids_bytes = meta.get("ids_bytes") or len("\n".join(self.ids).encode("utf-8")) + 1
+        self.rows = {id: i for i, id in enumerate(self.ids)}
+
+        # Row-major on disk, one array per word in memory
+        self.codes = np.zeros((_WORDS, max(n, 1024)), dtype=np.uint64)
+        self.alive = np.zeros(max(n, 1024), dtype=bool)
+        self.term_ends = np.zeros(max(n, 1024), dtype=np.int64)   # end of each row's df buckets in terms.bin
+        self.df = np.zeros(_DF_BUCKETS, dtype=np.int32)
+        if n:
+            self.codes[:, :n] = np.fromfile(self._file("codes.bin"), dtype=np.uint64, count=n * _WORDS).reshape(n, _WORDS).T
+            self.alive[:n] = np.fromfile(self._file("alive.bin"), dtype=bool, count=n)
+            self.df[:] = np.fromfile(self._file("df.bin"), dtype=np.int32)
+            if n > self.terms_from:
+                self.term_ends[self.terms_from:n] = np.fromfile(
+                    self._file("term_ends.bin"), dtype=np.int64, count=n - self.terms_from,
+                )
+            for id, i in list(self.rows.items()):
+                if not self.alive[i]:
+                    del self.rows[id]
+        self._vectors: np.memmap | None = None
+
+    def _catch_up(self) -> None:
+        """Reload if another process saved the index since we last did."""
+        if self._version() != self._seen:
+            self._load()
+
+    def _write_at(self, name: str, offset: int, data: bytes) -> None:
+        with open(self._file(name), "r+b" if os.path.exists(self._file(name)) else "w+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+
+    def _save(self) -> None:
+        n = len(self.ids)
+        self.alive[:n].tofile(self._file("alive.bin"))
+        self.df.tofile(self._file("df.bin"))
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"format": _FORMAT, "dim": DIM, "bits": BITS, "count": n, "ids_bytes": self.ids_bytes,
+                       "docs": self.docs, "terms_from": self.terms_from, "terms": self.terms,
+                       "watermark": self.watermark}, f)
+        os.replace(tmp, self._file("meta.json"))
+        self._seen = self._version()
+
+    def _vector_rows(self) -> np.memmap | None:
+        n = len(self.ids)
+        if self._vectors is None or len(self._vectors) != n:
+            self._vectors = np.memmap(self._file("vectors.bin"), dtype=np.float16, mode="r", shape=(n, DIM)) if n else None
+        return self._vectors
+
+    # ── Vectors ───────────────────────────────────────────────────────────
+    def vectorise(self, rows: list[dict]) -> np.ndarray:
+        return self._vectorise([_hashed(_features(row)) for row in rows])
+
+    def _count(self, hashed: list) -> list[np.ndarray]:
+        """Add each row's features to the document frequencies; returns each row's df buckets."""
+        terms = [np.unique(np.array([b for b, *_ in feats], dtype=np.uint32)) for feats in hashed]
+        for buckets in terms:
+            self.df[buckets] += 1
+        self.docs += len(terms)
+        return terms
+
+    def _vectorise(self, hashed: list) -> np.ndarray:
+        idf = np.log((self.docs + 1) / (self.df + 1)) + 1
+        vectors = np.zeros((len(hashed), DIM), dtype=np.float32)
+        for i, feats in enumerate(hashed):
+            for bucket, dim, sign, weight in feats:
+                vectors[i, dim] += sign * weight * idf[bucket]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    # ── Updates ───────────────────────────────────────────────────────────
+    def _tombstone(self, ids) -> int:
+        """Drop rows from the live set and count their features out of df."""
+        gone = 0
+        for id in ids:
+            i = self.rows.pop(id, None)
+            if i is None:
+                continue
+            self.alive[i] = False
+            gone += 1
+            if i >= self.terms_from:
+                start = int(self.term_ends[i - 1]) if i > self.terms_from else 0
+                buckets = np.fromfile(
+                    self._file("terms.bin"), dtype=np.uint32, count=int(self.term_ends[i]) - start, offset=start * 4,
+                )
+                self.df[buckets] -= 1
+                self.docs -= 1
+        return gone
+
+    def add(self, rows: list[dict], watermark: list | None = None) -> None:
+        """Index published rows, replacing any earlier version of each, and
+        optionally move the catch-up watermark past them (rows another
+        process already took past it are skipped)."""
+        if not rows:
+            return
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._catch_up()
+            if watermark is not None and self.watermark:
+                mark = tuple(self.watermark)
+                rows = [row for row in rows if (str(row["created_at"]), row["id"]) > mark]
+                if not rows:
+                    return
+            self._tombstone(row["id"] for row in rows)
+            hashed = [_hashed(_features(row)) for row in rows]
+            terms = self._count(hashed)
+            vectors = self._vectorise(hashed)
+            codes = _pack(vectors)
+
+            start, n = len(self.ids), len(self.ids) + len(rows)
+            if n > len(self.alive):
+                size = max(n, len(self.alive) * 2)
+                grown = np.zeros((_WORDS, size), dtype=np.uint64)
+                grown[:, :start] = self.codes[:, :start]
+                self.codes = grown
+                self.alive = np.resize(self.alive, size)
+                self.term_ends = np.resize(self.term_ends, size)
+            self.codes[:, start:n] = codes.T
+            self.alive[start:n] = True
+            ends = self.terms + np.cumsum([len(buckets) for buckets in terms], dtype=np.int64)
+            self.term_ends[start:n] = ends
+
+            ids = "".join(row["id"] + "\n" for row in rows).encode("utf-8")
+            self._write_at("vectors.bin", start * DIM * 2, vectors.astype(np.float16).tobytes())
+            self._write_at("codes.bin", start * BITS // 8, codes.tobytes())
+            self._write_at("ids.txt", self.ids_bytes, ids)
+            self._write_at("terms.bin", self.terms * 4, np.concatenate(terms).tobytes())
+            self._write_at("term_ends.bin", (start - self.terms_from) * 8, ends.tobytes())
+            self.ids_bytes += len(ids)
+            self.terms = int(ends[-1])
+            for i, row in enumerate(rows, start):
+                self.ids.append(row["id"])
+                self.rows[row["id"]] = i
+            if watermark is not None:
+                self.watermark = watermark
+            self._save()
+
+    def remove(self, ids: list[str]) -> None:
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._catch_up()
+            if self._tombstone(ids):
+                self._save()
+
+    def apply(self, rows: list[dict]) -> None:
+        """Index the published rows among `rows` and drop the rest."""
+        self.remove([row["id"] for row in rows if row.get("status") != "published"])
+        self.add([row for row in rows if row.get("status") == "published"])
+
+    # ── Queries ───────────────────────────────────────────────────────────
+    def query(self, id: str | None = None, row: dict | None = None, k: int = 10) -> list[tuple[str, float]]:
+        """The k rows closest to indexed `id`, or to an unindexed `row`."""
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            self._catch_up()
+            n = len(self.ids)
+            vectors = self._vector_rows()
+            if not n:
+                return []
+            i = self.rows.get(id) if id else None
+            if i is not None:
+                q = vectors[i].astype(np.float32)
+                code = self.codes[:, i].copy()
+            else:
+                q = self.vectorise([row])[0]
+                code = _pack(q[None, :])[0]
+
+            # Hamming distance to every code, then every row within the
+            # distance that takes in _RERANK candidates (found from a
+            # histogram, cheaper than a partition at this size)
+            distance = np.bitwise_count(self.codes[0, :n] ^ code[0]).astype(np.uint16)
+            for w in range(1, _WORDS):
+                distance += np.bitwise_count(self.codes[w, :n] ^ code[w])
+            distance[~self.alive[:n]] = BITS + 1
+            if i is not None:
+                distance[i] = BITS + 1
+            counts = np.cumsum(np.bincount(distance, minlength=BITS + 2)[:BITS + 1])
+            if not counts[-1]:
+                return []
+            cutoff = int(np.searchsorted(counts, min(_RERANK, counts[-1])))
+            candidates = np.flatnonzero(distance <= cutoff)
+            if len(candidates) > 4 * _RERANK:   # many ties at the cutoff
+                candidates = np.sort(candidates[np.argsort(distance[candidates], kind="stable")[:_RERANK]])
+            # candidates are sorted, so reads from the memmap are sequential
+            scores = vectors[candidates].astype(np.float32) @ q
+            top = np.argsort(-scores)[:k]
+            return [(self.ids[candidates[j]], round(float(scores[j]), 4)) for j in top]
+
+    def __contains__(self, id: str) -> bool:
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            self._catch_up()
+            return id in self.rows
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.rows)
+
+
+def lock_path(path: str) -> str:
+    # Beside the directory, not in it, so a rebuild can swap the directory
+    return os.path.normpath(path) + ".lock"
+
+
+_index: SimilarIndex | None = None
+_stale: set[str] = set()
+
+
+def enabled() -> bool:
+    return _index is not None
+
+
+def open_index(path: str | None = None) -> SimilarIndex:
+    global _index
+    _index = SimilarIndex(path or settings.similar_index_dir)
+    return _index
+
+
+async def update(rows: list[dict]) -> None:
+    """Call with rows whose status or content changed (e.g. from set_status)."""
+    if _index is not None and rows:
+        await asyncio.to_thread(_index.apply, rows)
+
+
+async def remove(ids: list[str]) -> None:
+    if _index is not None and ids:
+        await asyncio.to_thread(_index.remove, ids)
+
+
+def touch(ids: list[str]) -> None:
+    """Re-index these rows on the next refresh (e.g. after a new ai_summary)."""
+    if _index is not None:
+        _stale.update(ids)
+
+
+async def refresh(repo: PostmortemRepository) -> int:
+    """Index stale rows and published rows created after the watermark; returns rows indexed."""
+    if _index is None:
+        return 0
+    indexed = 0
+    if _stale:
+        ids = list(_stale)
+        _stale.difference_update(ids)
+        for i in range(0, len(ids), _BATCH):
+            rows = await repo.get_many(ids[i:i + _BATCH], fields=FIELDS)
+            await update(rows)
+            indexed += len(rows)
+
+    while True:
+        rows, _ = await repo.list_published(
+            company=None, severity=None, sort_by="created_at", desc=False, limit=_BATCH,
+            after=tuple(_index.watermark) if _index.watermark else None, count="none", fields=FIELDS,
+        )
+        if not rows:
+            return indexed
+        await asyncio.to_thread(_index.add, rows, [rows[-1]["created_at"], rows[-1]["id"]])
+        indexed += len(rows)
+        if len(rows) < _BATCH:
+            return indexed
+
+
+async def similar(
+    repo: PostmortemRepository, id: str, k: int, *, fields: tuple[str, ...] | None = None,
+) -> list[dict] | None:
+    """The k most similar published postmortems to `id`, or None if `id`
+    doesn't exist. `fields` is the projection of the returned rows."""
+    if _index is None:
+        raise RuntimeError("The similar incidents index is disabled")
+    row = None
+    if not await asyncio.to_thread(_index.__contains__, id):
+        row = await repo.get(id)
+        if row is None:
+            return None
+    matches = await asyncio.to_thread(_index.query, id, row, k)
+    if not matches:
+        return []
+    found = {r["id"]: r for r in await repo.get_many([m for m, _ in matches], fields=fields)}
+    return [
+        {**found[m], "score": score}
+        for m, score in matches
+        if m in found and found[m].get("status") == "published"
+    ]
+
+
+async def run_forever(repo: PostmortemRepository, interval: float) -> None:
+    while True:
+        try:
+            indexed = await refresh(repo)
+            if indexed:
+                await response_cache.invalidate()
+                logger.info("Similar index: %d rows indexed (%d live)", indexed, len(_index))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Similar index refresh failed")
+        await asyncio.sleep(interval)
+
+
+def _swap_in(built: str, path: str) -> None:
+    """Replace the index at `path` with the one built at `built`, under the
+    index lock so no process is mid-write; running processes reload it."""
+    with open(lock_path(path), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        old = None
+        if os.path.isdir(path):
+            old = os.path.normpath(path) + ".old"
+            shutil.rmtree(old, ignore_errors=True)
+            os.rename(path, old)
+        os.rename(built, path)
+    if old:
+        shutil.rmtree(old, ignore_errors=True)
+    try:
+        os.remove(lock_path(built))
+    except FileNotFoundError:
+        pass
+
+
+async def _main(rebuild: bool) -> None:
+    path = settings.similar_index_dir
+    # A rebuild is built aside and swapped in whole, so a running app keeps
+    # serving the old index until then
+    target = os.path.normpath(path) + ".rebuild" if rebuild else path
+    if rebuild:
+        shutil.rmtree(target, ignore_errors=True)
+    index = open_index(target)
+    try:
+        indexed = await refresh((await get_storage()).postmortems)
+    finally:
+        await close_storage()
+    if rebuild:
+        _swap_in(target, path)
+    print(f"Indexed {indexed} rows; {len(index)} live in {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the similar incidents index")
+    parser.add_argument("--rebuild", action="store_true", help="discard the index and rebuild it from storage")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args().rebuild))
@@ -0,0 +1,157 @@
+"""
+Deduplicated AI summary generation.
+
+Every request for the same postmortem, streamed or not, shares one
+in-flight generation (single-flight, per process): a producer task owns the
+Groq call, fans text out to any number of subscribers and stores the
+summary itself, so it is kept even when every viewer has left. With
+`settings.summary_lock` enabled, the producer also claims the row through
+`summary_status` so separate uvicorn workers don't generate the same
+summary either; a claim older than `summary_lock_ttl` is treated as
+abandoned.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import AsyncGenerator
+
+from app.core.config import settings
+from app.services import response_cache, similar
+from app.services.groq import generate_summary, stream_summary
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.5
+
+
+class _Flight:
+    """One generation: the text produced so far, replayed to each subscriber."""
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.done = False
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Condition()
+
+    async def push(self, text: str) -> None:
+        async with self._changed:
+            self.parts.append(text)
+            self._changed.notify_all()
+
+    async def finish(self) -> None:
+        async with self._changed:
+            self.done = True
+            self._changed.notify_all()
+
+    async def deltas(self) -> AsyncGenerator[str, None]:
+        """Everything produced so far, then new text as it arrives; raises if generation failed."""
+        seen = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: seen < len(self.parts) or self.done)
+                new = self.parts[seen:]
+            for text in new:
+                yield text
+            seen += len(new)
+            if self.done and seen == len(self.parts):
+                break
+        await asyncio.shield(self.task)
+
+
+_inflight: dict[str, _Flight] = {}
+
+
+def _flight(repo, post: dict, streaming: bool) -> _Flight:
+    """The post's in-flight generation, started if there is none.
+
+    The producer task is never cancelled by a subscriber leaving.
+    """
+    id = post["id"]
+    flight = _inflight.get(id)
+    if flight is None:
+        flight = _inflight[id] = _Flight()
+        flight.task = asyncio.create_task(_generate_once(repo, post, flight, streaming))
+        flight.task.add_done_callback(lambda task: _finished(id, task))
+    return flight
+
+
+def _finished(id: str, task: asyncio.Task) -> None:
+    _inflight.pop(id, None)
+    # Retrieved here so a failure nobody was still waiting for is logged once
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Summary generation for %s failed: %s", id, task.exception())
+
+
+async def summarise(repo, post: dict) -> str:
+    """Generate, store and return the summary for a post without one.
+
+    `repo` is the PostmortemRepository the summary is written to.
+    """
+    return await asyncio.shield(_flight(repo, post, streaming=False).task)
+
+
+async def stream(repo, post: dict) -> AsyncGenerator[str, None]:
+    """Yield summary text as it is generated.
+
+    Joins the generation already in flight for the post if there is one; a
+    non-streaming one arrives as a single chunk.
+    """
+    async for text in _flight(repo, post, streaming=True).deltas():
+        yield text
+
+
+def stale_before() -> datetime:
+    """Claims started before this are treated as abandoned."""
+    return datetime.now(timezone.utc) - timedelta(seconds=settings.summary_lock_ttl)
+
+
+async def _wait_for_other_worker(repo, id: str) -> str | None:
+    """Poll until the claiming worker stores a summary, gives up, or its claim expires."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.summary_lock_ttl
+    while loop.time() < deadline:
+        await asyncio.sleep(_POLL_INTERVAL)
+        row = await repo.summary_state(id)
+        if not row:
+            return None
+        if row.get("ai_summary"):
+            return row["ai_summary"]
+        if row.get("summary_status") != "generating":
+            return None
+    return None
+
+
+async def _generate_once(repo, post: dict, flight: _Flight, streaming: bool) -> str:
+    id = post["id"]
+    claimed = False
+    try:
+        if settings.summary_lock:
+            claimed = await repo.claim_summary(id, stale_before())
+            if not claimed:
+                summary = await _wait_for_other_worker(repo, id)
+                if summary:
+                    await flight.push(summary)
+                    return summary
+                logger.warning("Summary claim for %s was not fulfilled, generating locally", id)
+
+        try:
+            if streaming:
+                async for delta in stream_summary(post):
+                    await flight.push(delta)
+                summary = "".join(flight.parts).strip()
+            else:
+                summary = await generate_summary(post)
+                await flight.push(summary)
+        except BaseException:
+            if claimed:
+                await repo.release_summary_claim(id)
+            raise
+
+        if summary:
+            await repo.set_summary(id, summary)
+            await response_cache.invalidate()
+            similar.touch([id])
+        return summary
+    finally:
+        await flight.finish()
@@ -0,0 +1,188 @@
+"""
+Background summarisation of postmortems that have no ai_summary yet.
+
+Walks the backlog in id order, generates summaries concurrently through
+app.services.groq within a requests-per-minute and tokens-per-minute
+budget, and writes results back one batch at a time through the
+PostmortemRepository. All progress lives in the table itself, so a stopped
+run simply resumes on the next start.
+Prompts the LLM response cache (app.services.llm_cache) has already
+answered are filled in without spending any of the budget.
+
+Before calling Groq the worker claims the row through `summary_status`,
+the same claim on-demand requests take (app.services.summaries), so a
+summary is never generated twice; rows claimed elsewhere are skipped.
+
+Runs inside the app (SUMMARY_WORKER_ENABLED=true, stats at
+GET /admin/summaries/worker) or from the command line:
+
+    cd backend && python -m app.services.summary_worker [--once]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.db.repository import PostmortemRepository
+from app.db.storage import close_storage, get_storage
+from app.services import response_cache, similar
+from app.services.groq import cached_summary, close_client, estimate_tokens, generate_summary
+from app.services.rate_limit import TokenBucket
+from app.services.summaries import stale_before
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorkerStats:
+    queue_depth: int | None = None
+    generated: int = 0
+    failed: int = 0
+    passes: int = 0
+    last_error: str | None = None
+    started_at: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> dict:
+        elapsed_min = max(time.monotonic() - self.started_at, 1e-6) / 60
+        return {
+            "queue_depth": self.queue_depth,
+            "generated": self.generated,
+            "failed": self.failed,
+            "passes": self.passes,
+            "per_minute": round(self.generated / elapsed_min, 2),
+            "last_error": self.last_error,
+        }
+
+
+class SummaryWorker:
+    def __init__(
+        self,
+        repo: PostmortemRepository,
+        *,
+        concurrency: int = 4,
+        rpm: int = 30,
+        tpm: int = 12000,
+        batch_size: int = 50,
+    ):
+        self.repo = repo
+        self.batch_size = batch_size
+        self.stats = WorkerStats()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._requests = TokenBucket(rpm / 60, rpm)
+        self._tokens = TokenBucket(tpm / 60, tpm)
+
+    async def refresh_queue_depth(self) -> int:
+        self.stats.queue_depth = await self.repo.count_pending_summaries()
+        return self.stats.queue_depth
+
+    async def _summarise(self, post: dict) -> tuple[str, str] | None:
+        async with self._semaphore:
+            try:
+                # Cache hits cost no API budget
+                summary = await cached_summary(post)
+                if summary is not None:
+                    return post["id"], summary
+                await self._requests.acquire()
+                await self._tokens.acquire(estimate_tokens(post))
+                # Claimed only now, so the claim covers the call itself and
+                # not the wait for budget
+                if not await self.repo.claim_summary(post["id"], stale_before()):
+                    return None
+            except Exception as e:
+                self._failed(post, e)
+                return None
+            try:
+                summary = await generate_summary(post, check_cache=False)
+            except BaseException as e:
+                await self.repo.release_summary_claim(post["id"])
+                if not isinstance(e, Exception):
+                    raise
+                self._failed(post, e)
+                return None
+            return post["id"], summary
+
+    def _failed(self, post: dict, e: Exception) -> None:
+        self.stats.failed += 1
+        self.stats.last_error = f"{post['id']}: {e}"
+        logger.warning("Summary for %s failed: %s", post["id"], e)
+
+    async def _write(self, results: list[tuple[str, str]]) -> int:
+        # One statement per batch, guarded on ai_summary IS NULL so an
+        # on-demand summary written in the meantime is never overwritten;
+        # only the rows actually updated count as generated. Clears the
+        # worker's claims on them.
+        written = await self.repo.set_summaries(results)
+        if written:
+            await response_cache.invalidate()
+            similar.touch(written)
+        self.stats.generated += len(written)
+        return len(written)
+
+    async def run_once(self) -> int:
+        """One pass over the backlog. Rows that fail are skipped until the next pass."""
+        await self.refresh_queue_depth()
+        last_id = None
+        generated = 0
+        while True:
+            # Rows an on-demand request has claimed are left to it
+            rows = await self.repo.pending_summaries(last_id, self.batch_size, stale_before=stale_before())
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+
+            results = [r for r in await asyncio.gather(*(self._summarise(row) for row in rows)) if r]
+            written = await self._write(results)
+            generated += written
+
+            if self.stats.queue_depth is not None:
+                self.stats.queue_depth = max(self.stats.queue_depth - written, 0)
+            logger.info("Summary worker: %s", self.stats.as_dict())
+
+        self.stats.passes += 1
+        return generated
+
+    async def run_forever(self, idle_seconds: float = 300) -> None:
+        while True:
+            try:
+                if not await self.run_once():
+                    await asyncio.sleep(idle_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats.last_error = str(e)
+                logger.exception("Summary worker pass failed")
+                await asyncio.sleep(idle_seconds)
+
+
+def from_settings(repo: PostmortemRepository) -> SummaryWorker:
+    return SummaryWorker(
+        repo,
+        concurrency=settings.summary_worker_concurrency,
+        rpm=settings.summary_worker_rpm,
+        tpm=settings.summary_worker_tpm,
+        batch_size=settings.summary_worker_batch_size,
+    )
+
+
+async def _main(once: bool) -> None:
+    worker = from_settings((await get_storage()).postmortems)
+    try:
+        if once:
+            await worker.run_once()
+        else:
+            await worker.run_forever(settings.summary_worker_idle_seconds)
+    finally:
+        await close_client()
+        await close_storage()
+    print(worker.stats.as_dict())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate missing AI summaries")
+    parser.add_argument("--once", action="store_true", help="process the current backlog and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.once))
@@ -0,0 +1,300 @@
+"""
+Concurrent source sync engine.
+
+Runs many sources at once over one shared httpx client. Fetching and
+normalising is delegated to the handler registered for each source's
+`method` (app.services.handlers); the engine supplies the HTTP pool,
+batched writes, validators and progress events. A global semaphore caps
+how many sources sync at the same time and a token bucket per host spaces
+out page requests, so a slow or failing source only ever holds up its own
+slot. Pages, incidents seen / inserted / skipped and sync duration are
+recorded per source in app.services.metrics. Given a Deduper, new rows
+that repeat an incident already stored (from another source, or a
+re-created one) are flagged, held or merged as they're written.
+
+Used by the admin SSE route (one source, streamed events) and by
+scripts/sync_sources.py (all active sources, summary report).
+"""
+
+import asyncio
+import time
+from contextlib import aclosing, nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncGenerator, Awaitable, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.db.repository import Storage
+from app.services import metrics
+from app.services.dedupe import Deduper
+from app.services.handlers import FetchContext, NotModified, Page, SourceError, SourceHandler, get_handler
+from app.services.ingest import DEFAULT_CHUNK_SIZE, write_new_rows
+from app.services.leases import DEFAULT_TTL, LeaseUnavailable, hold
+from app.services.rate_limit import TokenBucket
+
+
+@dataclass
+class SourceResult:
+    slug: str
+    company: str
+    created: int = 0
+    incidents: int = 0
+    seconds: float = 0.0
+    write_seconds: float = 0.0
+    error: str | None = None
+
+
+class SyncEngine:
+    def __init__(
+        self,
+        storage: Storage,
+        *,
+        concurrency: int = 8,
+        host_rate: float = 2.0,
+        host_burst: int = 4,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        source_timeout: float = 300.0,
+        prefetch_pages: int = 2,
+        client: httpx.AsyncClient | None = None,
+        on_change: Callable[[], Awaitable[None]] | None = None,
+        deduper: Deduper | None = None,
+        lease_owner: str | None = None,
+        lease_ttl: float = DEFAULT_TTL,
+    ):
+        self.storage = storage
+        self.concurrency = concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.chunk_size = chunk_size
+        self.source_timeout = source_timeout
+        self.prefetch_pages = prefetch_pages
+        self.on_change = on_change
+        self.deduper = deduper
+        # When set, run() holds each source's lease (app.services.leases) while syncing it
+        self.lease_owner = lease_owner
+        self.lease_ttl = lease_ttl
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._client = client
+        self._owns_client = client is None
+
+    async def __aenter__(self) -> "SyncEngine":
+        if self._client is None:
+            self._client = httpx.AsyncClient(follow_redirects=True, timeout=15)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get(self, url: str, **kwargs) -> httpx.Response:
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        await bucket.acquire()
+        return await self._client.get(url, **kwargs)
+
+    async def stream(self, source: dict) -> AsyncGenerator[dict, None]:
+        """Sync one source through its method's handler, yielding SSE-style progress events.
+
+        Each page is written while the handler fetches the next one. The
+        first request is conditional; a 304 ends the sync with no writes.
+        `last_synced_at` and the fresh validators are only saved once every
+        new row has been written.
+        """
+        slug = source["slug"]
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            async with aclosing(self._stream(source)) as events:
+                async for event in events:
+                    if event["type"] == "done":
+                        outcome = "not_modified" if event["not_modified"] else "ok"
+                    yield event
+        finally:
+            metrics.sync_seconds.observe(time.perf_counter() - started, source=slug, outcome=outcome)
+
+    async def _stream(self, source: dict) -> AsyncGenerator[dict, None]:
+        slug = source["slug"]
+        try:
+            handler = get_handler(source.get("method") or "")
+            feed_url = handler.feed_url(source)
+        except SourceError as e:
+            yield {"type": "error", "message": str(e)}
+            return
+
+        yield {"type": "start", "message": f"Fetching incidents from {feed_url}..."}
+
+        async def get(url: str, **kwargs) -> httpx.Response:
+            metrics.sync_pages.inc(source=slug)
+            return await self._get(url, **kwargs)
+
+        ctx = FetchContext(
+            get=get,
+            validators=await self.storage.sources.get_validators(feed_url),
+            last_synced=source.get("last_synced_at"),
+        )
+
+        # Pages are fetched ahead into a bounded queue while the current one
+        # is written, so only a few pages are ever held in memory.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch_pages)
+        producer = asyncio.create_task(self._produce_pages(handler, source, ctx, queue))
+
+        not_modified = False
+        seen = 0
+        created = 0
+        pages = 0
+        write_seconds = 0.0
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if item[0] == "error":
+                    await self._changed(created)
+                    yield {"type": "error", "message": item[1]}
+                    return
+                if item[0] == "not_modified":
+                    not_modified = True
+                    break
+
+                page: Page = item[1]
+                pages = page.number
+                seen += page.seen
+
+                started = time.perf_counter()
+                new_rows = await write_new_rows(self.storage.postmortems, page.rows, self.chunk_size, self.deduper)
+                write_seconds += time.perf_counter() - started
+                created += len(new_rows)
+                duplicates = sum(1 for row in new_rows if row.get("duplicate_of"))
+
+                metrics.sync_incidents_seen.inc(page.seen, source=slug)
+                metrics.sync_incidents_inserted.inc(len(new_rows), source=slug)
+                metrics.sync_incidents_skipped.inc(page.seen - len(new_rows), source=slug)
+                if duplicates:
+                    metrics.sync_incidents_duplicate.inc(duplicates, source=slug)
+
+                yield {
+                    "type": "commits_page",
+                    "page": page.number,
+                    "total": seen,
+                    "created": created,
+                    "duplicates": duplicates,
+                    "message": f"Page {page.number}: {page.seen} incidents, {len(new_rows)} new"
+                               + (f" ({duplicates} near-duplicate)" if duplicates else ""),
+                }
+                for row in new_rows:
+                    yield {"type": "incident", "title": row["title"], "id": row["id"], "severity": row.get("severity"),
+                           "duplicate_of": row.get("duplicate_of")}
+        finally:
+            producer.cancel()
+
+        await self._changed(created)
+
+        yield {
+            "type": "commits_done",
+            "total": seen,
+            "sampling": seen,
+            "step": 1,
+            "message": (
+                "Not modified since the last sync" if not_modified
+                else f"Found {seen} incidents across {pages} page(s)"
+            ),
+        }
+
+        await self.storage.sources.save_validators(feed_url, ctx.fresh)
+        if source.get("id"):
+            await self.storage.sources.mark_synced(source["id"], datetime.now(timezone.utc).isoformat())
+
+        yield {
+            "type": "done",
+            "created": created,
+            "write_seconds": round(write_seconds, 3),
+            "not_modified": not_modified,
+        }
+
+    async def _changed(self, created: int) -> None:
+        """Tell the owner (e.g. the app's response cache) that rows were written."""
+        if created and self.on_change:
+            await self.on_change()
+
+    async def _produce_pages(
+        self,
+        handler: SourceHandler,
+        source: dict,
+        ctx: FetchContext,
+        queue: asyncio.Queue,
+    ) -> None:
+        """Run the handler, putting ("page", Page) items into `queue`, then None.
+
+        Failures end the queue with a single ("error", message) item and a
+        304 with ("not_modified",).
+        """
+        try:
+            async for page in handler.pages(source, ctx):
+                await queue.put(("page", page))
+        except NotModified:
+            await queue.put(("not_modified",))
+            return
+        except SourceError as e:
+            await queue.put(("error", str(e)))
+            return
+        except httpx.RequestError as e:
+            await queue.put(("error", f"Request failed: {e}"))
+            return
+        except Exception as e:
+            await queue.put(("error", str(e)))
+            return
+
+        await queue.put(None)
+
+    async def _run_one(self, source: dict, on_event: Callable[[dict, dict], None] | None) -> SourceResult:
+        result = SourceResult(slug=source["slug"], company=source["company"])
+        async with self._semaphore:
+            started = time.perf_counter()
+            lease = (
+                hold(self.storage.sources, source["id"], self.lease_owner, ttl=self.lease_ttl)
+                if self.lease_owner and source.get("id") else nullcontext()
+            )
+            try:
+                async with lease, asyncio.timeout(self.source_timeout):
+                    async for event in self.stream(source):
+                        if on_event:
+                            on_event(source, event)
+                        kind = event.get("type")
+                        if kind == "commits_done":
+                            result.incidents = event["total"]
+                        elif kind == "done":
+                            result.created = event["created"]
+                            result.write_seconds = event["write_seconds"]
+                        elif kind == "error":
+                            result.error = event["message"]
+            except LeaseUnavailable:
+                result.error = "already being synced elsewhere"
+            except TimeoutError:
+                result.error = f"timed out after {self.source_timeout:.0f}s"
+            except Exception as e:
+                result.error = str(e)
+            result.seconds = time.perf_counter() - started
+        return result
+
+    async def run(
+        self,
+        sources: list[dict],
+        on_event: Callable[[dict, dict], None] | None = None,
+    ) -> list[SourceResult]:
+        """Sync all sources concurrently. Never raises for a single failing source."""
+        return list(await asyncio.gather(*(self._run_one(s, on_event) for s in sources)))
+
+
+def format_report(results: list[SourceResult]) -> str:
+    lines = [f"{'source':<30} {'new':>6} {'seen':>6} {'time':>8} {'rows/s':>8}  status"]
+    for r in sorted(results, key=lambda r: r.seconds, reverse=True):
+        rate = f"{r.created / r.write_seconds:.0f}" if r.created and r.write_seconds else "-"
+        status = f"error: {r.error}" if r.error else "ok"
+        lines.append(f"{r.slug[:30]:<30} {r.created:>6} {r.incidents:>6} {r.seconds:>7.2f}s {rate:>8}  {status}")
+    return "\n".join(lines)
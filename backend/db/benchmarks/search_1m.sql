@@ -0,0 +1,42 @@
+-- Search benchmark at 1M rows
+-- Run against a scratch / local database (not production):
+--     psql "$DATABASE_URL" -f backend/db/benchmarks/search_1m.sql
+-- Everything runs in one transaction and is rolled back at the end.
+
+begin;
+
+\timing on
+
+-- 1M synthetic published incidents across 500 companies
+insert into postmortems (id, company, title, url, published_at, severity,
+                         affected_services, root_cause_category, ai_summary, tags, status)
+select
+  'bench-' || g,
+  'company-' || (g % 500),
+  (array['Database connection pool exhaustion', 'Elevated API error rates', 'DNS resolution failures',
+         'Degraded search performance', 'Certificate expiry outage', 'Queue backlog delays notifications',
+         'Cache stampede after deploy', 'Network partition in primary region'])[1 + g % 8] || ' #' || g,
+  'https://example.com/incidents/' || g,
+  now() - (g % 2000) * interval '1 day',
+  (array['low', 'medium', 'high', 'critical'])[1 + g % 4],
+  array[(array['api', 'checkout', 'search', 'auth', 'payments', 'notifications'])[1 + g % 6]],
+  (array['Resource Exhaustion', 'Deployment Error', 'Network', 'Configuration', 'Dependency Failure'])[1 + g % 5],
+  case when g % 3 = 0 then 'Services degraded after a configuration change exhausted the connection pool; '
+                           'the team rolled back and added capacity alarms.' end,
+  array['statuspage', (array['database', 'network', 'deploy', 'capacity'])[1 + g % 4]],
+  'published'
+from generate_series(1, 1000000) as g;
+
+analyze postmortems;
+
+-- Selective query: ranked page + facets
+explain (analyze, buffers) select search_postmortems('certificate expiry');
+select search_postmortems('certificate expiry') -> 'total' as total;
+
+-- Broad query with a company filter
+explain (analyze, buffers) select search_postmortems('connection pool', 'company-42');
+
+-- Phrase query, deep page
+explain (analyze, buffers) select search_postmortems('"cache stampede"', null, 'high', 20, 200);
+
+rollback;
@@ -0,0 +1,9 @@
+-- HTTP validators (ETag / Last-Modified) per polled URL, so syncs can send
+-- conditional requests and skip all work on a 304.
+create table if not exists http_validators (
+  url           text primary key,
+  etag          text,
+  last_modified text,
+  updated_at    timestamptz default now()
+);
+alter table http_validators enable row level security;
@@ -0,0 +1,5 @@
+-- Cross-worker claim for AI summary generation: a worker sets
+-- summary_status = 'generating' before calling the LLM so other
+-- workers wait for its result instead of generating the same summary.
+alter table postmortems add column if not exists summary_status     text;
+alter table postmortems add column if not exists summary_started_at timestamptz;
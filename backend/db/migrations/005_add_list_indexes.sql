@@ -0,0 +1,9 @@
+-- Composite indexes matching the public list query: filtered on status
+-- (and optionally company), ordered by the sort column with id as the
+-- keyset tie-breaker.
+create index if not exists idx_postmortems_status_published_id
+  on postmortems(status, published_at desc, id desc);
+create index if not exists idx_postmortems_status_company_published_id
+  on postmortems(status, company, published_at desc, id desc);
+create index if not exists idx_postmortems_status_created_id
+  on postmortems(status, created_at desc, id desc);
@@ -0,0 +1,84 @@
+-- Full-text search over postmortems: weighted tsvector kept up to date by a
+-- trigger (array_to_string is only STABLE, so a generated column can't be
+-- used), a GIN index, and one RPC returning ranked rows plus facet counts.
+
+alter table postmortems add column if not exists search_vector tsvector;
+
+create or replace function postmortems_search_vector_update() returns trigger
+language plpgsql as $$
+begin
+  new.search_vector :=
+    setweight(to_tsvector('english', coalesce(new.title, '')), 'A') ||
+    setweight(to_tsvector('english',
+      coalesce(array_to_string(new.tags, ' '), '') || ' ' ||
+      coalesce(array_to_string(new.affected_services, ' '), '') || ' ' ||
+      coalesce(new.root_cause_category, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(new.ai_summary, '')), 'C');
+  return new;
+end;
+$$;
+
+drop trigger if exists postmortems_search_vector on postmortems;
+create trigger postmortems_search_vector
+  before insert or update of title, ai_summary, tags, affected_services, root_cause_category
+  on postmortems
+  for each row execute function postmortems_search_vector_update();
+
+-- Backfill existing rows through the trigger
+update postmortems set title = title;
+
+create index if not exists idx_postmortems_search on postmortems using gin(search_vector);
+
+create or replace function search_postmortems(
+  q               text,
+  filter_company  text default null,
+  filter_severity text default null,
+  result_limit    int  default 20,
+  result_offset   int  default 0,
+  facet_limit     int  default 20
+) returns jsonb
+language sql stable as $$
+  with query as (
+    select websearch_to_tsquery('english', q) as tsq
+  ),
+  matches as (
+    select p.id, p.title, p.company, p.url, p.published_at, p.severity,
+           p.tags, p.affected_services, p.root_cause_category,
+           ts_rank_cd(p.search_vector, query.tsq) as rank
+    from postmortems p, query
+    where p.status = 'published'
+      and p.search_vector @@ query.tsq
+      and (filter_company  is null or p.company  = filter_company)
+      and (filter_severity is null or p.severity = filter_severity)
+  )
+  select jsonb_build_object(
+    'total', (select count(*) from matches),
+    'data', coalesce((
+      select jsonb_agg(to_jsonb(r) order by r.rank desc, r.published_at desc nulls last)
+      from (
+        select * from matches
+        order by rank desc, published_at desc nulls last
+        limit result_limit offset result_offset
+      ) r
+    ), '[]'::jsonb),
+    'facets', jsonb_build_object(
+      'company', coalesce((
+        select jsonb_agg(jsonb_build_object('value', company, 'count', n) order by n desc)
+        from (select company, count(*) as n from matches group by company order by n desc limit facet_limit) f
+      ), '[]'::jsonb),
+      'severity', coalesce((
+        select jsonb_agg(jsonb_build_object('value', severity, 'count', n) order by n desc)
+        from (select severity, count(*) as n from matches where severity is not null group by severity order by n desc limit facet_limit) f
+      ), '[]'::jsonb),
+      'root_cause_category', coalesce((
+        select jsonb_agg(jsonb_build_object('value', root_cause_category, 'count', n) order by n desc)
+        from (select root_cause_category, count(*) as n from matches where root_cause_category is not null
+              group by root_cause_category order by n desc limit facet_limit) f
+      ), '[]'::jsonb),
+      'tag', coalesce((
+        select jsonb_agg(jsonb_build_object('value', tag, 'count', n) order by n desc)
+        from (select tag, count(*) as n from matches, unnest(tags) as tag group by tag order by n desc limit facet_limit) f
+      ), '[]'::jsonb)
+    )
+  );
+$$;
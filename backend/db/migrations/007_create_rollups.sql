@@ -0,0 +1,117 @@
+-- Analytics rollups over published postmortems, maintained incrementally by
+-- a trigger so every write path (admin API, sync script, RSS handlers) keeps
+-- them current. Served by GET /postmortems/stats.
+
+create table if not exists rollup_monthly (
+  company  text not null,
+  severity text not null,            -- 'unknown' when null
+  month    date not null,
+  count    int  not null default 0,
+  primary key (company, severity, month)
+);
+create index if not exists idx_rollup_monthly_month on rollup_monthly(month);
+
+create table if not exists rollup_tags (
+  tag   text primary key,
+  count int  not null default 0
+);
+create index if not exists idx_rollup_tags_count on rollup_tags(count desc);
+
+create table if not exists rollup_companies (
+  company  text primary key,
+  count    int  not null default 0,
+  first_at timestamptz,
+  last_at  timestamptz
+);
+
+-- Mean time between incidents: span between first and last incident
+-- divided by the number of gaps
+create or replace view rollup_company_stats as
+  select company, count, first_at, last_at,
+         extract(epoch from last_at - first_at) / 86400.0 / nullif(count - 1, 0) as mean_days_between
+  from rollup_companies;
+
+create or replace function rollup_apply(r postmortems, delta int) returns void
+language plpgsql as $$
+begin
+  if r.status is distinct from 'published' then
+    return;
+  end if;
+
+  if r.published_at is not null then
+    insert into rollup_monthly as m (company, severity, month, count)
+    values (r.company, coalesce(r.severity, 'unknown'), date_trunc('month', r.published_at)::date, delta)
+    on conflict (company, severity, month) do update set count = m.count + excluded.count;
+  end if;
+
+  insert into rollup_tags as t (tag, count)
+  select distinct tag, delta from unnest(r.tags) as tag where tag <> ''
+  on conflict (tag) do update set count = t.count + excluded.count;
+
+  insert into rollup_companies as c (company, count)
+  values (r.company, delta)
+  on conflict (company) do update set count = c.count + excluded.count;
+
+  if delta < 0 then
+    delete from rollup_monthly
+    where company = r.company and severity = coalesce(r.severity, 'unknown')
+      and month = date_trunc('month', r.published_at)::date and count <= 0;
+    delete from rollup_tags where tag = any(r.tags) and count <= 0;
+    delete from rollup_companies where company = r.company and count <= 0;
+  end if;
+
+  -- First/last are two index lookups on (status, company, published_at)
+  update rollup_companies c
+  set first_at = b.first_at, last_at = b.last_at
+  from (
+    select min(published_at) as first_at, max(published_at) as last_at
+    from postmortems where status = 'published' and company = r.company
+  ) b
+  where c.company = r.company;
+end;
+$$;
+
+create or replace function rollup_postmortems_change() returns trigger
+language plpgsql security definer as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    perform rollup_apply(old, -1);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    perform rollup_apply(new, 1);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists postmortems_rollup on postmortems;
+create trigger postmortems_rollup
+  after insert or delete or update of status, company, severity, published_at, tags
+  on postmortems
+  for each row execute function rollup_postmortems_change();
+
+-- Backfill from the current table
+truncate rollup_monthly, rollup_tags, rollup_companies;
+
+insert into rollup_monthly (company, severity, month, count)
+select company, coalesce(severity, 'unknown'), date_trunc('month', published_at)::date, count(*)
+from postmortems where status = 'published' and published_at is not null
+group by 1, 2, 3;
+
+insert into rollup_tags (tag, count)
+select tag, count(distinct id) from postmortems, unnest(tags) as tag
+where status = 'published' and tag <> ''
+group by tag;
+
+insert into rollup_companies (company, count, first_at, last_at)
+select company, count(*), min(published_at), max(published_at)
+from postmortems where status = 'published'
+group by company;
+
+alter table rollup_monthly   enable row level security;
+alter table rollup_tags      enable row level security;
+alter table rollup_companies enable row level security;
+
+create policy "Public read rollups" on rollup_monthly   for select using (true);
+create policy "Public read rollups" on rollup_tags      for select using (true);
+create policy "Public read rollups" on rollup_companies for select using (true);
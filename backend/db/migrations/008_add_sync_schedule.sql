@@ -0,0 +1,11 @@
+-- Per-source sync schedule for the built-in scheduler (app.services.scheduler).
+-- sync_interval_seconds adapts to how often a source has new incidents;
+-- next_sync_at is when it is due again. A worker takes a lease on the row
+-- (lease_owner / lease_expires_at) before syncing, so only one worker syncs
+-- a source at a time; an expired lease is free to take.
+alter table sources add column if not exists sync_interval_seconds integer;
+alter table sources add column if not exists next_sync_at          timestamptz;
+alter table sources add column if not exists lease_owner           text;
+alter table sources add column if not exists lease_expires_at      timestamptz;
+
+create index if not exists idx_sources_due on sources(next_sync_at nulls first) where active;
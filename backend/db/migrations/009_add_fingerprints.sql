@@ -0,0 +1,27 @@
+-- Near-duplicate detection at ingest (app.services.dedupe). fingerprint is
+-- the hex MinHash signature of the title; each signature is split into LSH
+-- bands whose keys (company:band:hash) go in postmortem_bands, so finding
+-- candidates for a new row is an index lookup on its band keys.
+-- duplicate_of points a flagged or merged row at the original incident.
+alter table postmortems add column if not exists fingerprint  text;
+alter table postmortems add column if not exists duplicate_of text references postmortems(id) on delete set null;
+
+create index if not exists idx_postmortems_duplicate_of on postmortems(duplicate_of) where duplicate_of is not null;
+
+create table if not exists postmortem_bands (
+  band_key      text not null,
+  postmortem_id text not null references postmortems(id) on delete cascade,
+  primary key (band_key, postmortem_id)
+);
+alter table postmortem_bands enable row level security;
+
+-- One round trip however many keys a sync page produces (an in_() filter
+-- would put them all in the URL)
+create or replace function fingerprint_candidates(band_keys text[])
+returns table (id text, company text, published_at timestamptz, fingerprint text, duplicate_of text)
+language sql stable as $$
+  select p.id, p.company, p.published_at, p.fingerprint, p.duplicate_of
+  from postmortems p
+  where p.id in (select b.postmortem_id from postmortem_bands b where b.band_key = any(band_keys))
+    and p.fingerprint is not null;
+$$;
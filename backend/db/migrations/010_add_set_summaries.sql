@@ -0,0 +1,12 @@
+-- Batch write for the background summary worker (app.services.summary_worker):
+-- one statement per batch, guarded on ai_summary is null so a summary
+-- written on demand in the meantime is kept. Returns the ids it updated.
+create or replace function set_summaries(ids text[], summaries text[])
+returns table (id text)
+language sql as $$
+  update postmortems p
+  set ai_summary = s.summary, summary_status = null
+  from unnest(ids, summaries) as s(id, summary)
+  where p.id = s.id and p.ai_summary is null
+  returning p.id;
+$$;
@@ -0,0 +1,391 @@
+"""
+benchmark.py — API and sync hot-path benchmarks
+-----------------------------------------------
+Runs entirely offline: storage is a throwaway SQLite file (app.db.sqlite),
+Statuspage and Groq are answered by httpx.MockTransport stubs, and the API
+is called in-process through httpx.ASGITransport. Nothing touches Supabase
+or the network, so numbers are comparable between runs on the same box.
+
+Measures:
+    list      GET /postmortems/ latency at several offsets, filters and a
+              keyset page (response cache disabled)
+    sync      SyncEngine throughput for synthetic Statuspage histories
+    sse       per-event cost of the admin sync SSE route and the summary
+              stream route over consuming the generators directly
+    summary   POST /postmortems/{id}/summary, stored vs generated
+
+Run:
+    cd backend && python scripts/benchmark.py --out bench.json
+    cd backend && python scripts/benchmark.py --compare bench.json
+
+--compare exits with status 1 if any metric regressed by more than
+--threshold (default 10%) against the given baseline file.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Must be set before app settings are imported
+_TMP = tempfile.mkdtemp(prefix="continuum-bench-")
+os.environ.update({
+    "STORAGE_BACKEND":        "sqlite",
+    "SQLITE_PATH":            os.path.join(_TMP, "list.db"),
+    "CACHE_BACKEND":          "none",
+    "LLM_CACHE_ENABLED":      "false",
+    "ADMIN_SECRET":           "bench",
+    "GROQ_API_KEY":           "bench",
+    "SYNC_HOST_RATE":         "1e9",
+    "SYNC_HOST_BURST":        "1000000000",
+    "SUMMARY_LOCK":           "false",
+    "SUMMARY_WORKER_ENABLED": "false",
+})
+
+import httpx
+
+from app.core.config import settings
+from app.db.storage import close_storage, get_storage
+from app.main import app
+from app.api import sources as sources_api
+from app.services import groq, summaries
+from app.services.handlers.statuspage import PER_PAGE
+from app.services.sync_engine import SyncEngine
+
+_BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_COMPANIES = [f"company-{i}" for i in range(50)]
+_SEVERITIES = ["low", "medium", "high", "critical"]
+_IMPACTS = ["minor", "major", "critical"]
+_SUMMARY_DELTAS = 40
+
+
+# ── Stubs ─────────────────────────────────────────────────────────────────
+
+def statuspage_transport(total: int) -> httpx.MockTransport:
+    """A status page with `total` incidents, newest first, paged like the real API."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", 1))
+        per_page = int(request.url.params.get("per_page", PER_PAGE))
+        start = (page - 1) * per_page
+        incidents = [
+            {
+                "id":         f"inc{i:09d}",
+                "name":       f"Elevated error rates on API #{i}",
+                "impact":     _IMPACTS[i % len(_IMPACTS)],
+                "shortlink":  f"https://stspg.io/{i}",
+                "created_at": (_BASE - timedelta(minutes=i)).isoformat(),
+            }
+            for i in range(start, min(start + per_page, total))
+        ]
+        return httpx.Response(200, json={"incidents": incidents})
+
+    return httpx.MockTransport(handler)
+
+
+def groq_transport() -> httpx.MockTransport:
+    """Groq chat completions, plain and `stream: true`."""
+    words = [f"word{i} " for i in range(_SUMMARY_DELTAS)]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content).get("stream"):
+            body = "".join(
+                f"data: {json.dumps({'choices': [{'delta': {'content': w}}]})}\n\n" for w in words
+            ) + "data: [DONE]\n\n"
+            return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "".join(words)}}]})
+
+    return httpx.MockTransport(handler)
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────
+
+def synthetic_rows(n: int, prefix: str = "bench", summarised: bool = True) -> list[dict]:
+    return [
+        {
+            "id":                  f"{prefix}-{i:07d}",
+            "company":             _COMPANIES[i % len(_COMPANIES)],
+            "title":               f"Database connection pool exhaustion #{i}",
+            "url":                 f"https://example.com/incidents/{i}",
+            "published_at":        (_BASE - timedelta(hours=i)).isoformat(),
+            "severity":            _SEVERITIES[i % len(_SEVERITIES)],
+            "affected_services":   ["api", "checkout"][: 1 + i % 2],
+            "root_cause_category": "Resource Exhaustion",
+            "ai_summary":          "Connection pool exhausted under load; rolled back." if summarised else None,
+            "tags":                ["statuspage", "database"],
+            "status":              "published",
+        }
+        for i in range(n)
+    ]
+
+
+async def use_database(name: str):
+    """Point the app's storage at a fresh SQLite file."""
+    await close_storage()
+    settings.sqlite_path = os.path.join(_TMP, f"{name}.db")
+    return await get_storage()
+
+
+def latency(samples: list[float]) -> dict:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "value":   round(statistics.median(ms), 3),
+        "unit":    "ms",
+        "better":  "lower",
+        "n":       len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p95_ms":  round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+    }
+
+
+def throughput(count: int, seconds: float, unit: str) -> dict:
+    return {"value": round(count / seconds, 1), "unit": unit, "better": "higher", "seconds": round(seconds, 3)}
+
+
+async def timed(fn, repeat: int, warmup: int = 2) -> list[float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def api_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def read_sse(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> int:
+    events = 0
+    async with client.stream(method, url, **kwargs) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if line.startswith("data: "):
+                events += 1
+    return events
+
+
+# ── Benchmarks ────────────────────────────────────────────────────────────
+
+async def bench_list(rows: int, repeat: int) -> dict:
+    storage = await use_database("list")
+    await storage.postmortems.insert_new(synthetic_rows(rows))
+
+    async with api_client() as client:
+        async def get(**params):
+            resp = await client.get("/postmortems/", params=params)
+            resp.raise_for_status()
+            return resp
+
+        cursor = (await get(limit=20, offset=rows // 2 - 20)).json()["next_cursor"]
+        cases = {
+            "offset_0":            {"limit": 20, "offset": 0},
+            "offset_1000":         {"limit": 20, "offset": min(1000, rows - 20)},
+            "offset_half":         {"limit": 20, "offset": rows // 2},
+            "offset_half_nocount": {"limit": 20, "offset": rows // 2, "count": "none"},
+            "cursor_half":         {"limit": 20, "cursor": cursor},
+            "company":             {"limit": 20, "company": _COMPANIES[7]},
+            "company_severity":    {"limit": 20, "company": _COMPANIES[7], "severity": "high"},
+            "sort_company_asc":    {"limit": 20, "sort_by": "company", "sort_dir": "asc"},
+        }
+        return {
+            f"list.{name}": latency(await timed(functools.partial(get, **params), repeat))
+            for name, params in cases.items()
+        }
+
+
+async def bench_sync(sizes: list[int]) -> dict:
+    results = {}
+    for total in sizes:
+        storage = await use_database(f"sync_{total}")
+        source = {
+            "id": "bench", "slug": "bench", "company": "Bench", "method": "statuspage_api",
+            "config": {"statuspage_url": "https://status.bench.test"},
+        }
+        client = httpx.AsyncClient(transport=statuspage_transport(total))
+        async with SyncEngine(storage, host_rate=1e9, host_burst=1e9, client=client) as engine:
+            started = time.perf_counter()
+            [result] = await engine.run([source])
+            seconds = time.perf_counter() - started
+        await client.aclose()
+        if result.error:
+            raise RuntimeError(f"sync of {total} incidents failed: {result.error}")
+        results[f"sync.incidents_{total}"] = throughput(result.created, seconds, "incidents/s")
+    return results
+
+
+async def bench_sse(incidents: int, repeat: int) -> dict:
+    results = {}
+
+    # Admin sync route vs SyncEngine.stream, each run on a fresh database
+    direct, routed = [], []
+    events = 0
+    for run in range(repeat):
+        storage = await use_database(f"sse_direct_{run}")
+        source = await storage.sources.create({
+            "company": "Bench", "slug": "bench", "method": "statuspage_api",
+            "config": {"statuspage_url": "https://status.bench.test"},
+        })
+        client = httpx.AsyncClient(transport=statuspage_transport(incidents))
+        async with SyncEngine(storage, host_rate=1e9, host_burst=1e9, client=client) as engine:
+            started = time.perf_counter()
+            events = sum([1 async for _ in engine.stream(source)])
+            direct.append(time.perf_counter() - started)
+        await client.aclose()
+
+        storage = await use_database(f"sse_routed_{run}")
+        source = await storage.sources.create({
+            "company": "Bench", "slug": "bench", "method": "statuspage_api",
+            "config": {"statuspage_url": "https://status.bench.test"},
+        })
+        client = httpx.AsyncClient(transport=statuspage_transport(incidents))
+        # The route builds its own engine; hand it the stubbed client
+        sources_api.SyncEngine = functools.partial(SyncEngine, client=client)
+        try:
+            async with api_client() as api:
+                started = time.perf_counter()
+                await read_sse(api, "POST", f"/admin/sources/{source['id']}/sync", headers={"x-admin-secret": "bench"})
+                routed.append(time.perf_counter() - started)
+        finally:
+            sources_api.SyncEngine = SyncEngine
+            await client.aclose()
+
+    results["sse.sync_event_overhead"] = {
+        "value":  round((statistics.median(routed) - statistics.median(direct)) / events * 1e6, 2),
+        "unit":   "us/event",
+        "better": "lower",
+        "events": events,
+    }
+
+    # Summary stream route vs summaries.stream
+    storage = await use_database("sse_summary")
+    await storage.postmortems.insert_new(synthetic_rows(2 * repeat, "sse", summarised=False))
+    posts = iter(await storage.postmortems.pending_summaries(None, 2 * repeat))
+
+    async def direct_stream():
+        return sum([1 async for _ in summaries.stream(storage.postmortems, next(posts))])
+
+    async with api_client() as api:
+        async def routed_stream():
+            return await read_sse(api, "POST", f"/postmortems/{next(posts)['id']}/summary/stream")
+
+        direct = await timed(direct_stream, repeat, warmup=0)
+        routed = await timed(routed_stream, repeat, warmup=0)
+
+    results["sse.summary_event_overhead"] = {
+        "value":  round((statistics.median(routed) - statistics.median(direct)) / _SUMMARY_DELTAS * 1e6, 2),
+        "unit":   "us/event",
+        "better": "lower",
+        "events": _SUMMARY_DELTAS,
+    }
+    return results
+
+
+async def bench_summary(repeat: int) -> dict:
+    storage = await use_database("summary")
+    await storage.postmortems.insert_new(synthetic_rows(1, "stored"))
+    await storage.postmortems.insert_new(synthetic_rows(repeat + 2, "fresh", summarised=False))
+    fresh = iter(row["id"] for row in await storage.postmortems.pending_summaries(None, repeat + 2))
+
+    async with api_client() as client:
+        async def post(id: str):
+            resp = await client.post(f"/postmortems/{id}/summary")
+            resp.raise_for_status()
+
+        stored = await timed(functools.partial(post, "stored-0000000"), repeat)
+        generated = await timed(lambda: post(next(fresh)), repeat)
+
+    return {"summary.stored": latency(stored), "summary.generated": latency(generated)}
+
+
+# ── Reporting ─────────────────────────────────────────────────────────────
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """Print a comparison table; returns True if anything regressed past threshold."""
+    regressed = False
+    print(f"{'metric':<34} {'baseline':>12} {'current':>12} {'change':>8}  unit")
+    for name, result in current.items():
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            print(f"{name:<34} {'-':>12} {result['value']:>12} {'new':>8}  {result['unit']}")
+            continue
+        change = (result["value"] - base["value"]) / abs(base["value"])
+        worse = change if result["better"] == "lower" else -change
+        flag = ""
+        if worse > threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        print(f"{name:<34} {base['value']:>12} {result['value']:>12} {change:>+8.1%}  {result['unit']}{flag}")
+    return regressed
+
+
+async def run(args) -> dict:
+    await groq.close_client()
+    groq._client = httpx.AsyncClient(transport=groq_transport())
+
+    results = {}
+    try:
+        if "list" in args.only:
+            results.update(await bench_list(args.rows, args.repeat))
+        if "sync" in args.only:
+            results.update(await bench_sync(args.sync_sizes))
+        if "sse" in args.only:
+            results.update(await bench_sse(args.sse_incidents, max(args.repeat // 10, 3)))
+        if "summary" in args.only:
+            results.update(await bench_summary(args.repeat))
+    finally:
+        await close_storage()
+        await groq.close_client()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API and sync hot paths offline")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed regression (default 0.10)")
+    parser.add_argument("--only", default="list,sync,sse,summary", help="comma-separated benchmark groups")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows seeded for the list benchmarks")
+    parser.add_argument("--repeat", type=int, default=50, help="samples per latency benchmark")
+    parser.add_argument("--sync-sizes", default="1000,10000,100000", help="synthetic incidents per sync run")
+    parser.add_argument("--sse-incidents", type=int, default=1000, help="incidents streamed per SSE sync run")
+    args = parser.parse_args()
+    args.only = set(args.only.split(","))
+    args.sync_sizes = [int(n) for n in args.sync_sizes.split(",")]
+
+    results = asyncio.run(run(args))
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python":     platform.python_version(),
+        "machine":    platform.machine(),
+        "params":     {k: sorted(v) if isinstance(v, set) else v for k, v in vars(args).items()},
+        "results":    results,
+    }
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(results)} result(s) to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+    elif not args.out:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
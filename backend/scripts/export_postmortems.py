@@ -0,0 +1,76 @@
+"""
+export_postmortems.py — Bulk export of published postmortems
+-------------------------------------------------------------
+Streams every published postmortem, or those of one company / severity,
+straight from storage to a file or stdout as NDJSON, CSV or Parquet. Rows
+are read in keyset batches (app.services.export), so memory stays flat
+however large the corpus. The same export is served over HTTP at
+GET /postmortems/export.
+
+Run:
+    python backend/scripts/export_postmortems.py [--format ndjson|csv|parquet]
+        [--company SLUG] [--severity LEVEL] [--batch-size N] [--out FILE]
+
+Without --out the export goes to stdout. Parquet needs the optional
+`pyarrow` package.
+
+Env vars required (supabase backend):
+    SUPABASE_URL
+    SUPABASE_KEY
+
+Optional:
+    STORAGE_BACKEND     supabase | sqlite (default supabase)
+    SQLITE_PATH         database file for the sqlite backend (default continuum.db)
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.storage import storage_from_env
+from app.services import export
+
+load_dotenv()
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        storage = await storage_from_env()
+    except RuntimeError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    written = 0
+    try:
+        chunks = export.stream(
+            storage.postmortems, args.format,
+            company=args.company, severity=args.severity, batch_size=args.batch_size,
+        )
+        async for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+    except export.ExportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.out:
+            out.close()
+        await storage.close()
+
+    if args.out:
+        print(f"Wrote {written:,} bytes to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export published postmortems")
+    parser.add_argument("--format", choices=list(export.FORMATS), default="ndjson")
+    parser.add_argument("--company")
+    parser.add_argument("--severity")
+    parser.add_argument("--batch-size", type=int, default=export.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--out", help="output file (default stdout)")
+    asyncio.run(main(parser.parse_args()))
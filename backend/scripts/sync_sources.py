@@ -1,159 +1,136 @@
 """
-sync_sources.py — Standalone Statuspage sync script
-----------------------------------------------------
-Reads all active statuspage_api sources from Supabase, paginates through
-the full incident history, and inserts any new incidents as published.
+sync_sources.py — Standalone source sync script
+------------------------------------------------
+Reads all active sources from storage and syncs each one through the
+handler for its method (statuspage_api, rss, github_json, ...), inserting
+any new incidents. Sources are synced concurrently; a per-source timing
+report is printed at the end. Each source's sync lease is held while it
+syncs, so a run never overlaps the app's scheduler, the admin sync route or
+another run on the same source.
 
 Run:
-    python backend/scripts/sync_sources.py
+    python backend/scripts/sync_sources.py [method ...] [--every SECONDS]
 
-Env vars required:
+With no methods every registered method is synced. --every keeps polling
+in one process, reusing the HTTP pool and re-reading the source list each
+round, e.g. `sync_sources.py rss --every 300` for engineering-blog feeds.
+
+Env vars required (supabase backend):
     SUPABASE_URL
     SUPABASE_KEY
+
+Optional:
+    STORAGE_BACKEND     supabase | sqlite (default supabase)
+    SQLITE_PATH         database file for the sqlite backend (default continuum.db)
+    INGEST_CHUNK_SIZE   rows per bulk lookup / upsert (default 500)
+    SYNC_CONCURRENCY    sources synced at the same time (default 8)
+    SYNC_HOST_RATE      page requests per second per host (default 2)
+    SYNC_HOST_BURST     request burst allowed per host (default 4)
+    SYNC_TIMEOUT        seconds before a single source is abandoned (default 300)
+    FEED_PARSE_WORKERS  threads parsing RSS / Atom feeds (default min(4, CPUs))
+    DEDUPE_ENABLED      detect near-duplicate incidents (default true)
+    DEDUPE_ACTION       flag (set duplicate_of only) | hold | merge (default flag)
+    DEDUPE_THRESHOLD    estimated title similarity for a duplicate (default 0.6)
+    DEDUPE_WINDOW_DAYS  max published_at distance for a duplicate (default 7)
 """
 
+import argparse
+import asyncio
 import os
 import sys
-import requests
-from datetime import datetime, timezone
+import time
 from dotenv import load_dotenv
-from supabase import create_client
-
-load_dotenv()
-
-_SEVERITY_MAP = {
-    "minor":    "medium",
-    "major":    "high",
-    "critical": "critical",
-}
-
-PER_PAGE = 100
-
 
-def fetch_all_incidents(page_url: str, last_synced: str | None) -> list[dict]:
-    """Paginate through /api/v2/incidents.json, stop when we hit already-seen dates."""
-    all_incidents: list[dict] = []
-    page = 1
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    while True:
-        resp = requests.get(
-            f"{page_url}/api/v2/incidents.json",
-            params={"page": page, "per_page": PER_PAGE},
-            headers={"Accept": "application/json"},
-            timeout=15,
-        )
-        resp.raise_for_status()
-        batch = resp.json().get("incidents", [])
+from app.db.storage import storage_from_env
+from app.services import dedupe
+from app.services.leases import make_owner
+from app.services.handlers import methods
+from app.services.ingest import DEFAULT_CHUNK_SIZE
+from app.services.sync_engine import SyncEngine, format_report
 
-        if not batch:
-            break
-
-        stop_early = False
-        for inc in batch:
-            created_at = inc.get("created_at", "")
-            if last_synced and created_at and created_at <= last_synced:
-                stop_early = True
-                break
-            all_incidents.append(inc)
-
-        if stop_early or len(batch) < PER_PAGE:
-            break
-
-        page += 1
+load_dotenv()
 
-    return all_incidents
+CHUNK_SIZE     = int(os.environ.get("INGEST_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+CONCURRENCY    = int(os.environ.get("SYNC_CONCURRENCY", 8))
+HOST_RATE      = float(os.environ.get("SYNC_HOST_RATE", 2))
+HOST_BURST     = int(os.environ.get("SYNC_HOST_BURST", 4))
+SOURCE_TIMEOUT = float(os.environ.get("SYNC_TIMEOUT", 300))
 
 
-def sync_source(db, source: dict) -> int:
-    config      = source.get("config") or {}
-    page_url    = config.get("statuspage_url", "").strip().rstrip("/")
-    slug        = source["slug"]
-    company     = source["company"]
-    last_synced = source.get("last_synced_at")
-    source_id   = source["id"]
+def print_event(source: dict, event: dict) -> None:
+    slug = source["slug"]
+    kind = event.get("type")
+    if kind in ("start", "commits_done"):
+        print(f"  [{slug}] {event['message']}")
+    elif kind == "incident":
+        print(f"  [{slug}] + {event['title'][:80]}")
+    elif kind == "error":
+        print(f"  [{slug}] [error] {event['message']}")
 
-    if not page_url:
-        print(f"  [skip] {slug}: no statuspage_url configured")
-        return 0
-    if not page_url.startswith("http"):
-        page_url = f"https://{page_url}"
 
-    print(f"  Fetching {page_url} ...")
+async def main(wanted: list[str], every: float | None):
     try:
-        incidents = fetch_all_incidents(page_url, last_synced)
-    except Exception as e:
-        print(f"  [error] {slug}: {e}")
-        return 0
-
-    print(f"  Found {len(incidents)} new incident(s)")
-
-    created = 0
-    for incident in incidents:
-        impact = incident.get("impact", "none")
-        if impact in ("none", "maintenance"):
-            continue
-
-        incident_id = incident.get("id", "")
-        if not incident_id:
-            continue
-
-        entry_id   = f"{slug}-{incident_id[:12]}"
-        title      = incident.get("name") or f"{company}: Service Disruption"
-        severity   = _SEVERITY_MAP.get(impact, "medium")
-        shortlink  = incident.get("shortlink") or f"{page_url}/incidents/{incident_id}"
-        created_at = incident.get("created_at", "")
-
-        existing = db.table("postmortems").select("id").eq("id", entry_id).execute()
-        if not existing.data:
-            db.table("postmortems").insert({
-                "id":           entry_id,
-                "title":        title,
-                "company":      company,
-                "url":          shortlink,
-                "source_url":   page_url,
-                "published_at": created_at,
-                "severity":     severity,
-                "tags":         ["statuspage", slug, impact],
-                "status":       "published",
-            }).execute()
-            created += 1
-            print(f"    + {title[:80]}")
-
-    # Update last_synced_at
-    db.table("sources").update(
-        {"last_synced_at": datetime.now(timezone.utc).isoformat()}
-    ).eq("id", source_id).execute()
-
-    return created
-
-
-def main():
-    supabase_url = os.environ.get("SUPABASE_URL")
-    supabase_key = os.environ.get("SUPABASE_KEY")
-    if not supabase_url or not supabase_key:
-        print("ERROR: SUPABASE_URL and SUPABASE_KEY must be set")
+        storage = await storage_from_env()
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
         sys.exit(1)
 
-    db = create_client(supabase_url, supabase_key)
-
-    result = db.table("sources").select("*").eq("method", "statuspage_api").eq("active", True).execute()
-    sources = result.data
+    try:
+        async with SyncEngine(
+            storage,
+            concurrency=CONCURRENCY,
+            host_rate=HOST_RATE,
+            host_burst=HOST_BURST,
+            chunk_size=CHUNK_SIZE,
+            source_timeout=SOURCE_TIMEOUT,
+            deduper=dedupe.from_env(),
+            lease_owner=make_owner("sync_sources"),
+        ) as engine:
+            while True:
+                started = time.perf_counter()
+                await sync_all(storage, engine, wanted)
+                if every is None:
+                    break
+                delay = max(every - (time.perf_counter() - started), 0)
+                print(f"\nNext round in {delay:.0f}s.\n")
+                await asyncio.sleep(delay)
+    finally:
+        await storage.close()
+
+
+async def sync_all(storage, engine: SyncEngine, wanted: list[str]):
+    sources = [s for method in wanted for s in await storage.sources.list_active(method)]
 
     if not sources:
-        print("No active statuspage_api sources found.")
+        print(f"No active sources found for: {', '.join(wanted)}.")
         return
 
-    print(f"Syncing {len(sources)} source(s)...\n")
-    total_created = 0
+    print(f"Syncing {len(sources)} source(s), {CONCURRENCY} at a time...\n")
+    started = time.perf_counter()
+
+    results = await engine.run(sources, on_event=print_event)
 
-    for source in sources:
-        print(f"[{source['company']}] {source['slug']}")
-        created = sync_source(db, source)
-        total_created += created
-        print(f"  Done — {created} new\n")
+    total_created = sum(r.created for r in results)
+    failed = sum(1 for r in results if r.error)
 
-    print(f"Sync complete. {total_created} total new incidents published.")
+    print()
+    print(format_report(results))
+    print()
+    print(
+        f"Sync complete in {time.perf_counter() - started:.1f}s. "
+        f"{total_created} total new incidents published, {failed} source(s) failed."
+    )
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Sync active sources")
+    parser.add_argument("methods", nargs="*", help=f"source methods to sync (default: all of {', '.join(methods())})")
+    parser.add_argument("--every", type=float, help="keep polling, starting a round every SECONDS")
+    args = parser.parse_args()
+
+    unknown = set(args.methods) - set(methods())
+    if unknown:
+        parser.error(f"unknown method(s): {', '.join(sorted(unknown))}")
+    asyncio.run(main(args.methods or methods(), args.every))
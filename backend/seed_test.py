@@ -1,10 +1,9 @@
-import os
+import asyncio
 from dotenv import load_dotenv
-from supabase import create_client
 
-load_dotenv()
+from app.db.storage import storage_from_env
 
-db = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+load_dotenv()
 
 records = [
     {
@@ -23,7 +22,7 @@ records = [
     {
         "id": "etsy-test-002",
         "company": "etsy",
-        "tso this is what itle": "Search Index Corruption Following Deployment",
+        "title": "Search Index Corruption Following Deployment",
         "url": "https://www.etsy.com/codeascraft/search-index-incident-2023",
         "published_at": "2023-08-22T14:30:00Z",
         "severity": "high",
@@ -35,9 +34,19 @@ records = [
     },
 ]
 
-for r in records:
-    # upsert to avoid duplicate errors on re-runs
-    result = db.table("postmortems").upsert(r).execute()
-    print(f"Upserted: {result.data[0]['id']} [{result.data[0]['status']}]")
 
-print("\nDone. Check /admin/queue to review.")
+async def main():
+    storage = await storage_from_env()
+    try:
+        for r in records:
+            # upsert to avoid duplicate errors on re-runs
+            row = (await storage.postmortems.upsert([r]))[0]
+            print(f"Upserted: {row['id']} [{row['status']}]")
+    finally:
+        await storage.close()
+
+    print("\nDone. Check /admin/queue to review.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,32 +7,34 @@ const ADMIN_SECRET = process.env.ADMIN_SECRET ?? "";
 
 async function getStats() {
   try {
-    const [published, pending] = await Promise.all([
+    const [published, queue] = await Promise.all([
       fetch(`${API_URL}/postmortems?limit=100`, {
         headers: { "x-admin-secret": ADMIN_SECRET },
         cache: "no-store",
         signal: AbortSignal.timeout(8000),
       }).then((r) => (r.ok ? r.json() : { data: [], total: 0 })).then((j) => j.data ?? j),
-      fetch(`${API_URL}/admin/queue`, {
+      fetch(`${API_URL}/admin/queue?limit=500&fields=id,company`, {
         headers: { "x-admin-secret": ADMIN_SECRET },
         cache: "no-store",
         signal: AbortSignal.timeout(8000),
-      }).then((r) => (r.ok ? r.json() : [])),
+      }).then((r) => (r.ok ? r.json() : { data: [], total: 0 })),
     ]);
-    return { published, pending };
+    // The page holds at most 500 rows; total counts the whole queue
+    const pending = queue.data ?? queue;
+    return { published, pending, pendingTotal: queue.total ?? pending.length };
   } catch {
-    return { published: [], pending: [] };
+    return { published: [], pending: [], pendingTotal: 0 };
   }
 }
 
 export default async function AdminDashboard() {
-  const { published, pending } = await getStats();
+  const { published, pending, pendingTotal } = await getStats();
 
   const companies = [...new Set([...published, ...pending].map((p: { company: string }) => p.company))];
 
   const statCards = [
     { label: "Total published", value: published.length },
-    { label: "Pending review", value: pending.length, alert: pending.length > 0 },
+    { label: "Pending review", value: pendingTotal, alert: pendingTotal > 0 },
     { label: "Companies indexed", value: companies.length },
   ];
 
@@ -90,10 +92,10 @@ export default async function AdminDashboard() {
         </div>
       )}
 
-      {pending.length > 0 && (
+      {pendingTotal > 0 && (
         <div style={{ marginTop: 24, padding: "14px 16px", border: "1px solid #FF000F", background: "#0f0f0f", display: "flex", alignItems: "center", justifyContent: "space-between" }}>
           <p style={{ margin: 0, fontSize: 13, color: "#FF000F", fontFamily: "monospace" }}>
-            {pending.length} item{pending.length !== 1 ? "s" : ""} waiting for review
+            {pendingTotal} item{pendingTotal !== 1 ? "s" : ""} waiting for review
           </p>
           <a href="/admin/queue" style={{ fontSize: 12, color: "#FF000F", textDecoration: "none", fontWeight: 700, letterSpacing: "0.08em" }}>
             Go to queue →
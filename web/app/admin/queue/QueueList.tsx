@@ -189,6 +189,11 @@ export default function QueueList({ queue }: { queue: Postmortem[] }) {
                     <span style={{ fontSize: 11, color: "#333", fontFamily: "monospace" }}>
                       {formatDate(post.published_at)}
                     </span>
+                    {post.duplicate_of && (
+                      <span title={`Near-duplicate of ${post.duplicate_of}`} style={{ fontSize: 10, fontWeight: 700, color: "#c9a000", letterSpacing: "0.1em", textTransform: "uppercase" }}>
+                        Possible duplicate
+                      </span>
+                    )}
                   </div>
                   <p style={{ fontSize: 14, fontWeight: 600, color: "#fff", margin: "0 0 6px", lineHeight: 1.4 }}>
                     {post.title}
@@ -7,21 +7,30 @@ export const metadata: Metadata = { title: "Review Queue — Admin" };
 const API_URL = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000";
 const ADMIN_SECRET = process.env.ADMIN_SECRET ?? "";
 
-async function getQueue(): Promise<Postmortem[]> {
+interface QueueResult {
+  data: Postmortem[];
+  total: number;
+  next_cursor: string | null;
+}
+
+async function getQueue(cursor?: string): Promise<QueueResult> {
+  const url = new URL(`${API_URL}/admin/queue`);
+  url.searchParams.set("limit", "100");
+  if (cursor) url.searchParams.set("cursor", cursor);
   try {
-    const res = await fetch(`${API_URL}/admin/queue`, {
+    const res = await fetch(url.toString(), {
       headers: { "x-admin-secret": ADMIN_SECRET },
       cache: "no-store",
       signal: AbortSignal.timeout(8000),
     });
-    return res.ok ? res.json() : [];
+    return res.ok ? res.json() : { data: [], total: 0, next_cursor: null };
   } catch {
-    return [];
+    return { data: [], total: 0, next_cursor: null };
   }
 }
 
-export default async function QueuePage() {
-  const queue = await getQueue();
+export default async function QueuePage({ searchParams }: { searchParams: { cursor?: string } }) {
+  const { data: queue, total, next_cursor } = await getQueue(searchParams.cursor);
 
   return (
     <div>
@@ -34,12 +43,23 @@ export default async function QueuePage() {
             Review Queue
           </h1>
         </div>
-        <span style={{ fontSize: 13, color: queue.length > 0 ? "#FF000F" : "#444", fontFamily: "monospace" }}>
-          {queue.length} pending
+        <span style={{ fontSize: 13, color: total > 0 ? "#FF000F" : "#444", fontFamily: "monospace" }}>
+          {total} pending
         </span>
       </div>
 
       <QueueList queue={queue} />
+
+      {next_cursor && (
+        <div style={{ marginTop: 20, textAlign: "right" }}>
+          <a
+            href={`/admin/queue?cursor=${encodeURIComponent(next_cursor)}`}
+            style={{ fontSize: 12, color: "#FF000F", textDecoration: "none", fontWeight: 700, letterSpacing: "0.08em" }}
+          >
+            Next page →
+          </a>
+        </div>
+      )}
     </div>
   );
 }
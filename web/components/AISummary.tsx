@@ -17,24 +17,51 @@ export default function AISummary({ postId, cachedSummary }: Props) {
   useEffect(() => {
     if (cachedSummary) return;
 
-    let cancelled = false;
+    const controller = new AbortController();
 
-    fetch(`${API_URL}/postmortems/${postId}/summary`, { method: "POST" })
-      .then((r) => {
-        if (!r.ok) throw new Error("failed");
-        return r.json();
-      })
-      .then((data) => {
-        if (!cancelled) setSummary(data.summary);
-      })
+    async function streamSummary() {
+      const res = await fetch(`${API_URL}/postmortems/${postId}/summary/stream`, {
+        method: "POST",
+        signal: controller.signal,
+      });
+      if (!res.ok || !res.body) throw new Error("failed");
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let text = "";
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop() ?? "";
+        for (const line of lines) {
+          if (!line.startsWith("data: ")) continue;
+          const event = JSON.parse(line.slice(6));
+          if (event.type === "delta") {
+            text += event.text;
+            setSummary(text);
+            setLoading(false);
+          } else if (event.type === "done") {
+            setSummary(event.summary);
+          } else if (event.type === "error") {
+            throw new Error(event.message);
+          }
+        }
+      }
+    }
+
+    streamSummary()
       .catch(() => {
-        if (!cancelled) setError(true);
+        if (!controller.signal.aborted) setError(true);
       })
       .finally(() => {
-        if (!cancelled) setLoading(false);
+        if (!controller.signal.aborted) setLoading(false);
       });
 
-    return () => { cancelled = true; };
+    return () => controller.abort();
   }, [postId, cachedSummary]);
 
   if (loading) {
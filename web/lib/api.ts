@@ -5,6 +5,7 @@ const API_URL = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000";
 export interface PostmortemsResult {
   data: Postmortem[];
   total: number;
+  next_cursor?: string | null;
 }
 
 export async function getPostmortems(params?: {
@@ -14,6 +15,8 @@ export async function getPostmortems(params?: {
   sort_dir?: string;
   limit?: number;
   offset?: number;
+  cursor?: string;
+  count?: "exact" | "planned" | "estimated" | "none";
 }): Promise<PostmortemsResult> {
   const url = new URL(`${API_URL}/postmortems/`);
   if (params?.company) url.searchParams.set("company", params.company);
@@ -22,6 +25,8 @@ export async function getPostmortems(params?: {
   if (params?.sort_dir) url.searchParams.set("sort_dir", params.sort_dir);
   if (params?.limit) url.searchParams.set("limit", String(params.limit));
   if (params?.offset) url.searchParams.set("offset", String(params.offset));
+  if (params?.cursor) url.searchParams.set("cursor", params.cursor);
+  if (params?.count) url.searchParams.set("count", params.count);
 
   try {
     const res = await fetch(url.toString(), { cache: "no-store" });
@@ -11,8 +11,9 @@ export interface Postmortem {
   severity: Severity | null;
   affected_services: string[];
   root_cause_category: string | null;
-  ai_summary: string | null;
+  ai_summary?: string | null; // left out of list responses unless requested via fields=
   tags: string[];
   status: PostmortemStatus;
   created_at: string;
+  duplicate_of?: string | null; // near-duplicate of this id, flagged at ingest
 }